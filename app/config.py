@@ -3,131 +3,183 @@ Configuration settings for DeFi Guard OSINT API
 """
 
 import os
-from typing import List, Dict, Any
-from pydantic import BaseSettings, Field
+from bisect import bisect_right
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Dict, Any, Final, Mapping, Tuple
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 
+# Load .env exactly once for the whole process; other modules read
+# configuration through ``get_settings()`` instead of re-parsing the file
 load_dotenv()
 
+# Source Configuration (static; kept off Settings so pydantic never copies or validates it)
+SOURCES_CONFIG: Final[Mapping[str, Mapping[str, Any]]] = MappingProxyType({
+    "rekt": MappingProxyType({
+        "enabled": True,
+        "base_url": "https://rekt.news",
+        "max_pages": 5,
+        "rate_limit": 2.0,  # seconds between requests
+        "priority": 1
+    }),
+    "chainalysis": MappingProxyType({
+        "enabled": True,
+        "base_url": "https://blog.chainalysis.com",
+        "max_pages": 3,
+        "rate_limit": 3.0,
+        "priority": 2
+    })
+})
+
+# Risk Assessment Configuration
+RISK_THRESHOLDS: Final[Mapping[str, Mapping[str, float]]] = MappingProxyType({
+    "amount_lost": MappingProxyType({
+        "low": 0,
+        "medium": 100_000,
+        "high": 1_000_000,
+        "critical": 10_000_000
+    }),
+    "severity_score": MappingProxyType({
+        "low": 0.0,
+        "medium": 4.0,
+        "high": 7.0,
+        "critical": 9.0
+    })
+})
+
 class Settings(BaseSettings):
     """Application settings with environment variable support"""
     
+    # Fields are read from the matching upper-case environment variables.
+    # extra="ignore" because .env also carries keys not modelled here (e.g. OPENAI_API_KEY)
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        extra="ignore",
+        defer_build=True
+    )
+    
     # API Settings
-    api_title: str = Field(default="DeFi Guard OSINT API", env="API_TITLE")
-    api_version: str = Field(default="1.0.0", env="API_VERSION")
-    api_description: str = Field(default="Threat Intelligence API for DeFi Protocols", env="API_DESCRIPTION")
-    debug: bool = Field(default=False, env="DEBUG")
-    secret_key: str = Field(default="your-secret-key-here", env="SECRET_KEY")
+    api_title: str = Field(default="DeFi Guard OSINT API")
+    api_version: str = Field(default="1.0.0")
+    api_description: str = Field(default="Threat Intelligence API for DeFi Protocols")
+    debug: bool = Field(default=False)
+    secret_key: str = Field(default="your-secret-key-here")
     
     # Database Settings
-    database_url: str = Field(default="sqlite:///./defi_guard.db", env="DATABASE_URL")
+    database_url: str = Field(default="sqlite:///./defi_guard.db")
     
     # Redis Settings
-    redis_url: str = Field(default="redis://localhost:6379", env="REDIS_URL")
+    redis_url: str = Field(default="redis://localhost:6379")
     
     # Scraping Settings
-    scraper_delay: float = Field(default=1.0, env="SCRAPER_DELAY")
-    max_concurrent_requests: int = Field(default=5, env="MAX_CONCURRENT_REQUESTS")
-    user_agent: str = Field(default="DeFiGuard-OSINT-Bot/1.0", env="USER_AGENT")
-    request_timeout: int = Field(default=30, env="REQUEST_TIMEOUT")
+    scraper_delay: float = Field(default=1.0)
+    max_concurrent_requests: int = Field(default=5)
+    user_agent: str = Field(default="DeFiGuard-OSINT-Bot/1.0")
+    request_timeout: int = Field(default=30)
+    article_cache_dir: str = Field(default="cache/articles")
+    article_cache_days: int = Field(default=7)
     
     # Scheduler Settings
-    enable_background_scraping: bool = Field(default=True, env="ENABLE_BACKGROUND_SCRAPING")
-    scraping_interval_hours: int = Field(default=4, env="SCRAPING_INTERVAL_HOURS")
-    maintenance_hour: int = Field(default=2, env="MAINTENANCE_HOUR")  # 2 AM
+    enable_background_scraping: bool = Field(default=True)
+    scraping_interval_hours: int = Field(default=4)
+    maintenance_hour: int = Field(default=2)  # 2 AM
     
     # Data Retention Settings
-    max_items_per_source: int = Field(default=1000, env="MAX_ITEMS_PER_SOURCE")
-    data_retention_days: int = Field(default=365, env="DATA_RETENTION_DAYS")
-    
-    # Source Configuration
-    sources_config: Dict[str, Dict[str, Any]] = {
-        "rekt": {
-            "enabled": True,
-            "base_url": "https://rekt.news",
-            "max_pages": 5,
-            "rate_limit": 2.0,  # seconds between requests
-            "priority": 1
-        },
-        "chainalysis": {
-            "enabled": True,
-            "base_url": "https://blog.chainalysis.com",
-            "max_pages": 3,
-            "rate_limit": 3.0,
-            "priority": 2
-        }
-    }
-    
-    # Risk Assessment Configuration
-    risk_thresholds: Dict[str, Dict[str, Any]] = {
-        "amount_lost": {
-            "low": 0,
-            "medium": 100_000,
-            "high": 1_000_000,
-            "critical": 10_000_000
-        },
-        "severity_score": {
-            "low": 0.0,
-            "medium": 4.0,
-            "high": 7.0,
-            "critical": 9.0
-        }
-    }
+    max_items_per_source: int = Field(default=1000)
+    data_retention_days: int = Field(default=365)
     
     # Logging Configuration
-    log_level: str = Field(default="INFO", env="LOG_LEVEL")
-    log_file: str = Field(default="logs/defi_guard.log", env="LOG_FILE")
-    log_rotation: str = Field(default="1 day", env="LOG_ROTATION")
-    log_retention: str = Field(default="30 days", env="LOG_RETENTION")
+    log_level: str = Field(default="INFO")
+    log_file: str = Field(default="logs/defi_guard.log")
+    log_rotation: str = Field(default="1 day")
+    log_retention: str = Field(default="30 days")
     
     # API Rate Limiting
-    rate_limit_requests: int = Field(default=100, env="RATE_LIMIT_REQUESTS")
-    rate_limit_window: int = Field(default=60, env="RATE_LIMIT_WINDOW")  # seconds
+    rate_limit_requests: int = Field(default=100)
+    rate_limit_window: int = Field(default=60)  # seconds
     
     # CORS Settings
-    cors_origins: List[str] = Field(default=["*"], env="CORS_ORIGINS")
-    cors_credentials: bool = Field(default=True, env="CORS_CREDENTIALS")
-    cors_methods: List[str] = Field(default=["*"], env="CORS_METHODS")
-    cors_headers: List[str] = Field(default=["*"], env="CORS_HEADERS")
+    cors_origins: List[str] = Field(default=["*"])
+    cors_credentials: bool = Field(default=True)
+    cors_methods: List[str] = Field(default=["*"])
+    cors_headers: List[str] = Field(default=["*"])
     
     # Feature Flags
-    enable_caching: bool = Field(default=True, env="ENABLE_CACHING")
-    enable_metrics: bool = Field(default=True, env="ENABLE_METRICS")
-    enable_auth: bool = Field(default=False, env="ENABLE_AUTH")
+    enable_caching: bool = Field(default=True)
+    enable_metrics: bool = Field(default=True)
+    enable_auth: bool = Field(default=False)
     
     # Chrome/Selenium Settings (for future use with dynamic content)
-    chrome_headless: bool = Field(default=True, env="CHROME_HEADLESS")
-    chrome_no_sandbox: bool = Field(default=True, env="CHROME_NO_SANDBOX")
-    chrome_disable_dev_shm: bool = Field(default=True, env="CHROME_DISABLE_DEV_SHM")
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    chrome_headless: bool = Field(default=True)
+    chrome_no_sandbox: bool = Field(default=True)
+    chrome_disable_dev_shm: bool = Field(default=True)
 
-# Global settings instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the cached application settings (built on first use)"""
+    return Settings()
 
-def get_source_config(source_name: str) -> Dict[str, Any]:
-    """Get configuration for a specific source"""
-    return settings.sources_config.get(source_name, {})
+@lru_cache(maxsize=None)
+def get_source_config(source_name: str) -> Mapping[str, Any]:
+    """Get configuration for a specific source (read-only view)"""
+    return SOURCES_CONFIG.get(source_name, MappingProxyType({}))
+
+@lru_cache(maxsize=1)
+def _enabled_sources_tuple() -> Tuple[str, ...]:
+    """Names of enabled sources, derived once from the settings"""
+    return tuple(
+        source for source, config in SOURCES_CONFIG.items()
+        if config.get("enabled", False)
+    )
+
+@lru_cache(maxsize=1)
+def _flat_risk_thresholds() -> Dict[Tuple[str, str], float]:
+    """Risk thresholds flattened to ``{(metric, level): value}``"""
+    return {
+        (metric, level): value
+        for metric, levels in RISK_THRESHOLDS.items()
+        for level, value in levels.items()
+    }
 
 def get_enabled_sources() -> List[str]:
     """Get list of enabled sources"""
-    return [
-        source for source, config in settings.sources_config.items()
-        if config.get("enabled", False)
-    ]
+    return list(_enabled_sources_tuple())
 
 def get_risk_threshold(metric: str, level: str) -> float:
     """Get risk threshold for a metric and level"""
-    return settings.risk_thresholds.get(metric, {}).get(level, 0)
+    return _flat_risk_thresholds().get((metric, level), 0)
+
+@lru_cache(maxsize=None)
+def _risk_cutoffs(metric: str) -> Tuple[Tuple[float, ...], Tuple[str, ...]]:
+    """Sorted ``(cutoffs, levels)`` pair for a risk metric"""
+    ordered = sorted(RISK_THRESHOLDS.get(metric, {}).items(), key=lambda kv: kv[1])
+    return tuple(v for _, v in ordered), tuple(level for level, _ in ordered)
+
+def _classify(metric: str, value: float) -> str:
+    cutoffs, levels = _risk_cutoffs(metric)
+    if not cutoffs:
+        return "low"
+    return levels[max(bisect_right(cutoffs, value) - 1, 0)]
+
+def classify_amount(amount: float) -> str:
+    """Map an amount lost (USD) to its risk level name"""
+    return _classify("amount_lost", amount)
+
+def classify_severity(score: float) -> str:
+    """Map a severity score (0-10) to its risk level name"""
+    return _classify("severity_score", score)
 
 def is_development() -> bool:
     """Check if running in development mode"""
-    return settings.debug
+    return get_settings().debug
 
-def get_chrome_options() -> List[str]:
+@lru_cache(maxsize=None)
+def get_chrome_options() -> Tuple[str, ...]:
     """Get Chrome options for Selenium (future use)"""
+    settings = get_settings()
     options = []
     
     if settings.chrome_headless:
@@ -149,11 +201,12 @@ def get_chrome_options() -> List[str]:
         f"--user-agent={settings.user_agent}"
     ])
     
-    return options
+    return tuple(options)
 
 # Environment-specific configurations
 def get_database_config() -> Dict[str, Any]:
     """Get database configuration"""
+    settings = get_settings()
     config = {
         "url": settings.database_url,
         "echo": settings.debug,  # Log SQL queries in debug mode
@@ -170,7 +223,7 @@ def get_database_config() -> Dict[str, Any]:
 def get_redis_config() -> Dict[str, Any]:
     """Get Redis configuration"""
     return {
-        "url": settings.redis_url,
+        "url": get_settings().redis_url,
         "decode_responses": True,
         "socket_timeout": 5,
         "socket_connect_timeout": 5,
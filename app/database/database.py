@@ -1,32 +1,122 @@
-from sqlalchemy import create_engine, Column, String, DateTime, Date, Float, Boolean, Text, Integer, JSON
+from sqlalchemy import create_engine, desc, event, select, text, Column, String, DateTime, Date, Float, Boolean, Text, Integer, JSON, Index
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.sql import func
-import os
-from dotenv import load_dotenv
+from typing import Any, Dict, Iterable, List, Set
 
-load_dotenv()
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, StaticPool
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./defi_guard.db")
+from app.config import get_database_config
+
+_db_config = get_database_config()
+DATABASE_URL = _db_config.pop("url")
+
+def _create_engine(url: str, config: dict):
+    """Create the engine with pooling suited to the backend"""
+    if url.startswith("sqlite"):
+        connect_args = {"check_same_thread": False}
+        if make_url(url).database in (None, "", ":memory:"):
+            # In-memory databases only exist on one connection
+            return create_engine(url, echo=config.get("echo", False),
+                                 connect_args=connect_args, poolclass=StaticPool)
+        return create_engine(url, echo=config.get("echo", False), connect_args=connect_args)
+    
+    return create_engine(
+        url,
+        poolclass=QueuePool,
+        pool_pre_ping=True,  # Drop connections the server closed while idle
+        pool_recycle=1800,
+        **config
+    )
 
 try:
-    if DATABASE_URL.startswith("sqlite"):
-        engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-    else:
-        engine = create_engine(DATABASE_URL)
+    engine = _create_engine(DATABASE_URL, _db_config)
 except ImportError as e:
     if "psycopg2" in str(e) and not DATABASE_URL.startswith("sqlite"):
         print("Warning: PostgreSQL driver not available, falling back to SQLite")
         DATABASE_URL = "sqlite:///./defi_guard.db"
-        engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+        engine = _create_engine(DATABASE_URL, _db_config)
     else:
         raise
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Use WAL so readers don't block on the scraper's writes"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Async engine for the API request path; scrapers and scripts keep the sync engine
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def _async_database_url(url: str) -> str:
+    """Swap the sync DBAPI driver in url for its asyncio counterpart"""
+    parsed = make_url(url)
+    return parsed.set(drivername=_ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)).render_as_string(hide_password=False)
+
+def _create_async_engine(url: str, config: dict):
+    """Create the async engine with the same pooling rules as the sync one"""
+    if url.startswith("sqlite"):
+        if make_url(url).database in (None, "", ":memory:"):
+            return create_async_engine(url, echo=config.get("echo", False), poolclass=StaticPool)
+        return create_async_engine(url, echo=config.get("echo", False))
+    
+    return create_async_engine(
+        url,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        echo=config.get("echo", False),
+        pool_size=config.get("pool_size", 5),
+        max_overflow=config.get("max_overflow", 10)
+    )
+
+ASYNC_DATABASE_URL = _async_database_url(DATABASE_URL)
+async_engine = _create_async_engine(ASYNC_DATABASE_URL, _db_config)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+if ASYNC_DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _set_async_sqlite_pragmas(dbapi_connection, connection_record):
+        """Same WAL settings for connections opened by the async engine"""
+        _set_sqlite_pragmas(dbapi_connection, connection_record)
 Base = declarative_base()
 
 class ThreatIntelDB(Base):
     __tablename__ = "threat_intel"
+    __table_args__ = (
+        # Composite indexes matching the filter/group-by shapes used by the API
+        Index("ix_ti_risk_source", "risk_level", "source_name"),
+        Index("ix_ti_protocol_date", "protocol_name", "published_date"),
+        Index("ix_ti_attack_sev", "attack_type", "severity_score"),
+        Index("ix_ti_blockchain_amount", "blockchain", "amount_lost"),
+        Index("ix_ti_pubdate_desc", "published_date"),
+        # Recency filters test published_date OR scraped_date; with both
+        # indexed Postgres can combine two index scans instead of scanning
+        Index("ix_ti_scraped_date", "scraped_date"),
+        # Matches the severity-first ORDER BY of listings, trending and search
+        Index("ix_ti_rank", desc("severity_score"), desc("published_date"), desc("scraped_date")),
+        # Trigram indexes let Postgres serve the API's ILIKE '%term%' filters
+        # and search without a sequential scan; other backends skip them
+        *(
+            Index(
+                f"ix_ti_{column}_trgm", column,
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"}
+            ).ddl_if(dialect="postgresql")
+            for column in ("title", "description", "protocol_name", "source_name", "attack_type", "blockchain")
+        ),
+    )
 
     id = Column(String, primary_key=True, index=True)
     title = Column(String, nullable=False, index=True)
@@ -45,14 +135,94 @@ class ThreatIntelDB(Base):
     is_verified = Column(Boolean, default=False)
     additional_data = Column(JSON)
 
+def bulk_upsert(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Insert threat intel rows in one statement, updating rows whose source_url
+    already exists. None values never overwrite stored data.
+    Returns the number of rows written.
+    """
+    if not rows:
+        return 0
+    
+    # One row per URL: ON CONFLICT can't touch the same row twice in a batch
+    rows = list({row["source_url"]: row for row in rows}.values())
+    
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        for row in rows:
+            db.merge(ThreatIntelDB(**row))
+        return len(rows)
+    
+    stmt = insert(ThreatIntelDB)
+    update_columns = {
+        column.name: func.coalesce(stmt.excluded[column.name], column)
+        for column in ThreatIntelDB.__table__.columns
+        if column.name not in ("id", "source_url")
+    }
+    stmt = stmt.on_conflict_do_update(index_elements=["source_url"], set_=update_columns)
+    db.execute(stmt, rows)
+    return len(rows)
+
+async def get_known_source_urls(urls: Iterable[str]) -> Set[str]:
+    """Return the subset of urls already stored, in one indexed lookup"""
+    urls = list(urls)
+    if not urls:
+        return set()
+    
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(ThreatIntelDB.source_url).where(ThreatIntelDB.source_url.in_(urls))
+        )
+        return set(result.scalars())
+
+# Bump when tables or indexes change so create_tables() runs its checks again
+SCHEMA_VERSION = 4
+
+# Arbitrary pg_advisory_xact_lock key that serializes create_tables() callers
+_SCHEMA_LOCK_KEY = 7212024
+
 def create_tables():
-    """Create all tables"""
-    Base.metadata.create_all(bind=engine)
+    """
+    Create all tables and indexes. A single-row schema_version marker table
+    records the last applied version, so later calls only pay for a lookup.
+    Safe to run concurrently (the API startup and scripts/init_db.py both call it).
+    """
+    with engine.begin() as conn:
+        # Take the schema lock before any checks, so a concurrent caller waits
+        # and then finds the marker current instead of racing the
+        # checkfirst lookups in create_all and the index loop below
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        elif conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _SCHEMA_LOCK_KEY})
+        
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version "
+            "(id INTEGER PRIMARY KEY, version INTEGER NOT NULL)"
+        ))
+        current = conn.execute(text("SELECT version FROM schema_version WHERE id = 1")).scalar() or 0
+        if current >= SCHEMA_VERSION:
+            return
+        
+        if conn.dialect.name == "postgresql":
+            # Needed by the gin_trgm_ops indexes on threat_intel
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        
+        Base.metadata.create_all(bind=conn)
+        # create_all skips indexes on tables that already exist
+        for index in ThreatIntelDB.__table__.indexes:
+            index.create(bind=conn, checkfirst=True)
+        
+        conn.execute(text(
+            "INSERT INTO schema_version (id, version) VALUES (1, :version) "
+            "ON CONFLICT (id) DO UPDATE SET version = excluded.version"
+        ), {"version": SCHEMA_VERSION})
 
-def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -1,7 +1,10 @@
-from pydantic import BaseModel, Field, HttpUrl
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, field_validator
+from typing import List, Optional, Dict, Any, Literal
+from typing_extensions import Annotated
 from datetime import datetime, date
 from enum import Enum
+from functools import lru_cache
+import time
 
 class RiskLevel(str, Enum):
     LOW = "low"
@@ -9,16 +12,34 @@ class RiskLevel(str, Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
+RiskLevelName = Literal["low", "medium", "high", "critical"]
+
+def _lower(value: Any) -> Any:
+    return value.lower() if isinstance(value, str) else value
+
+# Case-insensitive risk level for request parameters
+RiskLevelParam = Annotated[RiskLevelName, BeforeValidator(_lower)]
+
+@lru_cache(maxsize=1)
+def _utcnow_for_tick(tick: int) -> datetime:
+    return datetime.utcnow()
+
+def _scraped_now() -> datetime:
+    """UTC now, shared by every item built within the same 100ms window"""
+    return _utcnow_for_tick(int(time.monotonic() * 10))
+
 class ThreatIntelItem(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     id: Optional[str] = Field(None, description="Unique identifier")
     title: str = Field(..., description="Title of the threat intelligence item")
     description: str = Field(..., description="Detailed description of the threat")
     protocol_name: Optional[str] = Field(None, description="Name of the affected DeFi protocol")
-    risk_level: RiskLevel = Field(..., description="Risk level assessment")
-    source_url: HttpUrl = Field(..., description="Source URL of the article/report")
+    risk_level: RiskLevelName = Field(..., description="Risk level assessment")
+    source_url: str = Field(..., description="Source URL of the article/report")
     source_name: str = Field(..., description="Name of the source (e.g., Rekt, Chainalysis)")
     published_date: Optional[date] = Field(None, description="Publication date")
-    scraped_date: datetime = Field(default_factory=datetime.utcnow, description="Date when data was scraped")
+    scraped_date: datetime = Field(default_factory=_scraped_now, description="Date when data was scraped")
     tags: List[str] = Field(default_factory=list, description="Related tags/keywords")
     amount_lost: Optional[float] = Field(None, description="Amount lost in USD (if applicable)")
     attack_type: Optional[str] = Field(None, description="Type of attack (if applicable)")
@@ -27,13 +48,22 @@ class ThreatIntelItem(BaseModel):
     is_verified: bool = Field(default=False, description="Whether the information is verified")
     additional_data: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Additional metadata")
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None,
-            date: lambda v: v.isoformat() if v else None
-        }
+    @field_validator("risk_level", mode="before")
+    @classmethod
+    def _risk_level_value(cls, v):
+        # Scrapers pass RiskLevel members; store the plain string
+        return v.value if isinstance(v, RiskLevel) else v
+
+    @field_validator("source_url")
+    @classmethod
+    def _check_source_url(cls, v: str) -> str:
+        if not v.startswith(("http://", "https://")):
+            raise ValueError("source_url must be an http(s) URL")
+        return v
 
 class ThreatIntelResponse(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     status: str = Field(..., description="Response status")
     count: int = Field(..., description="Number of items returned")
     total_count: Optional[int] = Field(None, description="Total number of items available")
@@ -42,11 +72,15 @@ class ThreatIntelResponse(BaseModel):
     last_updated: Optional[datetime] = Field(None, description="Last update timestamp")
 
 class ScrapeRequest(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     sources: Optional[List[str]] = Field(None, description="List of sources to scrape")
     force_refresh: bool = Field(default=False, description="Force refresh of cached data")
     max_pages: Optional[int] = Field(default=5, description="Maximum pages to scrape per source")
 
 class ScrapeResponse(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     status: str = Field(..., description="Scrape status")
     sources_scraped: List[str] = Field(..., description="List of sources that were scraped")
     items_found: int = Field(..., description="Number of new items found")
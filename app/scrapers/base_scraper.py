@@ -1,48 +1,232 @@
 import abc
 import asyncio
+import hashlib
+import os
 import aiohttp
-from typing import List, Optional, Dict, Any
-from datetime import datetime
-from bs4 import BeautifulSoup
-import re
+import diskcache
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Dict, Any, Type
 
-from app.models.threat_intel import ThreatIntelItem, RiskLevel
+from app.config import get_settings
+from app.database.database import get_known_source_urls
+from app.models.threat_intel import ThreatIntelItem
+from app.scrapers.parsing import ArticleParser, get_parse_pool, parse_in_worker, shutdown_parse_pool
+from app.services.protocol_classifier import protocol_classifier
+from app.utils.cache import TTLCache
 from app.utils.logger import logger
+from app.utils.rate_limit import RateLimiter
+
+_MISSING = object()
 
 class BaseScraper(abc.ABC):
     """Base class for all threat intelligence scrapers"""
     
+    # Number of article pages scraped concurrently
+    max_concurrency = 5
+    
+    # Whether the source's items are marked as verified
+    is_verified = False
+    
+    # Response body caps; the extractors only use the first part of a page
+    max_page_bytes = 512 * 1024
+    max_article_bytes = 128 * 1024
+    
     def __init__(self, name: str, base_url: str):
         self.name = name
         self.base_url = base_url
         self.session: Optional[aiohttp.ClientSession] = None
         self.rate_limit_delay = 1.0  # Default 1 second between requests
+        self._rate_limiter: Optional[RateLimiter] = None
+        self._article_cache: Optional[diskcache.Cache] = None
+        # index page url -> (ETag, Last-Modified, body) for conditional re-fetches
+        self._validators = TTLCache(maxsize=256, ttl=86400)
     
     async def initialize(self, session: aiohttp.ClientSession):
         """Initialize the scraper with an aiohttp session"""
         self.session = session
+        self._rate_limiter = RateLimiter(self.rate_limit_delay)
+        
+        # Published articles rarely change, so processed results are kept on
+        # disk across restarts instead of being refetched every cycle
+        cache_dir = os.path.join(
+            get_settings().article_cache_dir,
+            self.name.lower().replace(' ', '_')
+        )
+        self._article_cache = diskcache.Cache(cache_dir)
         logger.info(f"Initialized {self.name} scraper")
     
     async def close(self):
         """Cleanup scraper resources"""
+        if self._article_cache is not None:
+            self._article_cache.close()
         logger.info(f"Closing {self.name} scraper")
     
+    @property
+    @abc.abstractmethod
+    def article_parser(self) -> Type[ArticleParser]:
+        """Parser class for this source's article pages, run in the worker processes"""
+        pass
+    
     @abc.abstractmethod
     async def scrape(self) -> List[ThreatIntelItem]:
         """Scrape threat intelligence data from the source"""
         pass
     
-    async def fetch_page(self, url: str, **kwargs) -> Optional[str]:
-        """Fetch a web page and return its content"""
+    async def parse_article(self, content: str) -> Optional[Dict[str, Any]]:
+        """Run article_parser in the parsing pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(get_parse_pool(), parse_in_worker, self.article_parser, content)
+        except BrokenProcessPool:
+            # A dead worker poisons the whole pool; start a fresh one next time
+            shutdown_parse_pool()
+            raise
+    
+    def _article_key(self, url: str) -> str:
+        return hashlib.blake2b(url.encode(), digest_size=16).hexdigest()
+    
+    def cache_article(self, url: str, item: Optional[ThreatIntelItem]):
+        """Remember the outcome for an article; None marks it as not relevant"""
+        if self._article_cache is not None:
+            expire = get_settings().article_cache_days * 86400
+            self._article_cache.set(self._article_key(url), item, expire=expire)
+    
+    def prune_article_cache(self) -> int:
+        """Drop expired article outcomes from disk; returns how many were removed"""
+        if self._article_cache is None:
+            return 0
+        return self._article_cache.expire()
+    
+    async def scrape_articles(self, urls: List[str]) -> List[ThreatIntelItem]:
+        """Scrape article pages concurrently and classify them in one batch"""
+        results: Dict[str, Optional[ThreatIntelItem]] = {}
+        pending = []
+        for url in urls:
+            cached = _MISSING
+            if self._article_cache is not None:
+                cached = self._article_cache.get(self._article_key(url), default=_MISSING)
+            if cached is _MISSING:
+                pending.append(url)
+            else:
+                results[url] = cached
+        
+        # Articles already in the database were processed on an earlier run
+        # whose cache entry has since expired or been lost; skip them too
+        if pending:
+            try:
+                known = await get_known_source_urls(pending)
+            except Exception as e:
+                logger.warning(f"Could not check for known {self.name} articles: {str(e)}")
+                known = set()
+            if known:
+                logger.info(f"Skipping {len(known)} {self.name} articles already in the database")
+                pending = [url for url in pending if url not in known]
+        
+        # Fetch and parse every uncached page, bounded by max_concurrency
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def fetch_one(url: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await self._fetch_article(url)
+        
+        fetched = await asyncio.gather(*(fetch_one(url) for url in pending), return_exceptions=True)
+        
+        parsed = []
+        for url, fields in zip(pending, fetched):
+            if isinstance(fields, Exception):
+                logger.error(f"Error scraping article {url}: {str(fields)}")
+            elif fields is not None:
+                parsed.append((url, fields))
+        
+        # Use AI to classify protocol and check if it's relevant threat intelligence
+        verdicts = await protocol_classifier.is_threat_intel_relevant_batch(
+            [(fields['title'], fields['description']) for _, fields in parsed]
+        )
+        
+        for (url, fields), verdict in zip(parsed, verdicts):
+            try:
+                results[url] = self._build_item(url, fields, verdict)
+            except Exception as e:
+                logger.error(f"Error scraping article {url}: {str(e)}")
+        
+        items = []
+        for url in urls:
+            item = results.get(url)
+            if item:
+                items.append(item)
+                logger.debug(f"Scraped article: {item.title}")
+        
+        return items
+    
+    async def _fetch_article(self, url: str) -> Optional[Dict[str, Any]]:
+        """Fetch an article page and extract its fields"""
+        content = await self.fetch_page(url, max_bytes=self.max_article_bytes)
+        if not content:
+            return None
+        
+        fields = await self.parse_article(content)
+        if fields is None:
+            logger.warning(f"Missing title or description for {url}")
+        return fields
+    
+    def _build_item(self, url: str, fields: Dict[str, Any], verdict: Dict[str, Any]) -> Optional[ThreatIntelItem]:
+        """Turn parsed fields and the classifier verdict into an item, caching the outcome"""
+        title = fields['title']
+        
+        if not verdict['is_relevant']:
+            logger.info(f"{self.name} article filtered out - {verdict['reason']}: {title[:50]}...")
+            self.cache_article(url, None)
+            return None
+        
+        # Get the AI-classified protocol name
+        protocol_name = verdict['protocol']
+        logger.info(f"Classified protocol: {protocol_name} for {self.name} article: {title[:50]}...")
+        
+        fields['additional_data']['ai_classification_confidence'] = verdict['confidence']
+        
+        item = ThreatIntelItem(
+            **fields,
+            protocol_name=protocol_name,
+            source_url=url,
+            source_name=self.name,
+            is_verified=self.is_verified
+        )
+        self.cache_article(url, item)
+        return item
+    
+    async def fetch_page(self, url: str, max_bytes: Optional[int] = None, **kwargs) -> Optional[str]:
+        """Fetch a web page and return its content, truncated to max_bytes"""
         if not self.session:
             raise RuntimeError("Scraper not initialized")
         
+        # Only index pages (fetched without a size cap) are revalidated;
+        # article pages are already skipped via the article cache and the
+        # known-URL check, so keeping their bodies would just hold memory
+        revalidate = max_bytes is None
+        validators = self._validators.get(url) if revalidate else None
+        if validators:
+            etag, last_modified, _ = validators
+            headers = dict(kwargs.pop('headers', None) or {})
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+            kwargs['headers'] = headers
+        
         try:
-            await asyncio.sleep(self.rate_limit_delay)
+            await self._rate_limiter.wait()
             
             async with self.session.get(url, **kwargs) as response:
-                if response.status == 200:
-                    content = await response.text()
+                if response.status == 304 and validators:
+                    logger.debug(f"Not modified since last fetch: {url}")
+                    return validators[2]
+                elif response.status == 200:
+                    raw = await self._read_body(response, max_bytes or self.max_page_bytes)
+                    content = raw.decode(response.charset or 'utf-8', errors='replace')
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+                    if revalidate and (etag or last_modified):
+                        self._validators.set(url, (etag, last_modified, content))
                     logger.debug(f"Successfully fetched {url}")
                     return content
                 else:
@@ -53,131 +237,14 @@ class BaseScraper(abc.ABC):
             logger.error(f"Error fetching {url}: {str(e)}")
             return None
     
-    def parse_html(self, content: str) -> BeautifulSoup:
-        """Parse HTML content using BeautifulSoup"""
-        return BeautifulSoup(content, 'html.parser')
-    
-    def extract_protocol_name(self, text: str) -> Optional[str]:
-        """Extract DeFi protocol name from text using common patterns"""
-        # Common DeFi protocol patterns
-        defi_protocols = [
-            'uniswap', 'compound', 'aave', 'makerdao', 'curve', 'yearn', 'synthetix',
-            'balancer', 'sushiswap', 'pancakeswap', '1inch', 'kyber', 'bancor',
-            'cream', 'alpha', 'harvest', 'pickle', 'badger', 'convex', 'frax',
-            'olympus', 'wonderland', 'tomb', 'spell', 'rari', 'fuse', 'iron',
-            'mirror', 'anchor', 'terra', 'polygon', 'arbitrum', 'optimism',
-            'avalanche', 'fantom', 'bsc', 'harmony'
-        ]
-        
-        text_lower = text.lower()
-        for protocol in defi_protocols:
-            if protocol in text_lower:
-                return protocol.title()
-        
-        # Try to extract from common patterns
-        patterns = [
-            r'(\w+)\s+(?:protocol|finance|swap|dao)',
-            r'(?:protocol|finance|swap|dao)\s+(\w+)',
-            r'(\w+)\s+(?:exploit|hack|attack)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                potential_protocol = match.group(1)
-                if len(potential_protocol) > 2:  # Avoid very short matches
-                    return potential_protocol.title()
-        
-        return None
-    
-    def assess_risk_level(self, amount_lost: Optional[float] = None, 
-                         keywords: List[str] = None, 
-                         title: str = "", 
-                         description: str = "") -> RiskLevel:
-        """Assess risk level based on various factors"""
-        keywords = keywords or []
-        text = f"{title} {description}".lower()
-        
-        # Critical indicators
-        critical_keywords = ['critical', 'emergency', 'immediate', 'urgent', 'exploit']
-        high_keywords = ['hack', 'attack', 'vulnerability', 'breach', 'stolen', 'drained']
-        medium_keywords = ['warning', 'risk', 'issue', 'concern', 'potential']
-        
-        # Check amount lost
-        if amount_lost:
-            if amount_lost >= 10_000_000:  # $10M+
-                return RiskLevel.CRITICAL
-            elif amount_lost >= 1_000_000:  # $1M+
-                return RiskLevel.HIGH
-            elif amount_lost >= 100_000:  # $100K+
-                return RiskLevel.MEDIUM
-        
-        # Check keywords
-        if any(keyword in text for keyword in critical_keywords):
-            return RiskLevel.CRITICAL
-        elif any(keyword in text for keyword in high_keywords):
-            return RiskLevel.HIGH
-        elif any(keyword in text for keyword in medium_keywords):
-            return RiskLevel.MEDIUM
-        
-        return RiskLevel.LOW
-    
-    def extract_amount_lost(self, text: str) -> Optional[float]:
-        """Extract monetary amount lost from text"""
-        # Patterns for different currency formats
-        patterns = [
-            r'\$?([\d,]+(?:\.\d{2})?)\s*(?:million|m)',
-            r'\$?([\d,]+(?:\.\d{2})?)\s*(?:billion|b)',
-            r'\$?([\d,]+(?:\.\d{2})?)\s*(?:thousand|k)',
-            r'\$?([\d,]+(?:\.\d{2})?)',
-        ]
-        
-        text_lower = text.lower()
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, text_lower)
-            for match in matches:
-                try:
-                    amount_str = match.group(1).replace(',', '')
-                    amount = float(amount_str)
-                    
-                    # Apply multipliers
-                    if 'billion' in match.group(0) or 'b' in match.group(0):
-                        amount *= 1_000_000_000
-                    elif 'million' in match.group(0) or 'm' in match.group(0):
-                        amount *= 1_000_000
-                    elif 'thousand' in match.group(0) or 'k' in match.group(0):
-                        amount *= 1_000
-                    
-                    # Only return if it's a reasonable amount (> $1000)
-                    if amount > 1000:
-                        return amount
-                        
-                except (ValueError, IndexError):
-                    continue
-        
-        return None
-    
-    def extract_tags(self, title: str, description: str) -> List[str]:
-        """Extract relevant tags from title and description"""
-        text = f"{title} {description}".lower()
-        
-        tag_patterns = {
-            'exploit': ['exploit', 'attack', 'hack'],
-            'vulnerability': ['vulnerability', 'bug', 'flaw'],
-            'defi': ['defi', 'decentralized finance'],
-            'smart_contract': ['smart contract', 'contract'],
-            'flash_loan': ['flash loan', 'flashloan'],
-            'rug_pull': ['rug pull', 'rugpull', 'exit scam'],
-            'governance': ['governance', 'voting', 'proposal'],
-            'oracle': ['oracle', 'price feed'],
-            'bridge': ['bridge', 'cross-chain'],
-            'token': ['token', 'cryptocurrency', 'crypto'],
-        }
-        
-        tags = []
-        for tag, keywords in tag_patterns.items():
-            if any(keyword in text for keyword in keywords):
-                tags.append(tag)
-        
-        return tags
+    async def _read_body(self, response: aiohttp.ClientResponse, max_bytes: int) -> bytes:
+        """Read at most max_bytes of the (already decompressed) response body"""
+        chunks = []
+        remaining = max_bytes
+        while remaining > 0:
+            chunk = await response.content.read(remaining)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b''.join(chunks)
@@ -0,0 +1,355 @@
+"""
+Article page parsing for the Chainalysis blog; runs in the scraper's parsing
+worker processes
+"""
+
+from typing import Any, Dict, Optional
+from datetime import datetime, date
+
+from dateutil.parser import parse as date_parse
+from loguru import logger
+from lxml.etree import XPath
+import orjson
+
+from app.scrapers.parsing import (
+    ArticleParser, DATE_NOISE_PATTERN, WHITESPACE_PATTERN, PAGE_DATE_PATTERNS,
+    compile_selectors, content_text, element_text, parse_lxml, select_one
+)
+from app.models.threat_intel import RiskLevel
+from app.utils.keywords import KeywordMatcher
+
+# Checked in order; the first category with a matching keyword wins
+_ANALYSIS_TYPES = KeywordMatcher([
+    ('trend_analysis', ['trend', 'patterns', 'analysis over time']),
+    ('incident_analysis', ['incident', 'hack analysis', 'post-mortem']),
+    ('market_analysis', ['market', 'trading', 'volume']),
+    ('technical_analysis', ['technical', 'blockchain analysis', 'on-chain']),
+    ('regulatory_analysis', ['regulation', 'compliance', 'legal']),
+    ('threat_intelligence', ['threat', 'security', 'risk assessment']),
+])
+
+_REPORT_PERIODS = KeywordMatcher([
+    ('annual_report', ['annual', 'yearly', 'year']),
+    ('monthly_report', ['monthly', 'month']),
+    ('quarterly_report', ['quarterly', 'quarter']),
+])
+
+_INSIGHT_KEYWORDS = KeywordMatcher.from_keywords(['insight', 'findings'])
+
+_GEO_REGIONS = KeywordMatcher.from_keywords([
+    'united states', 'usa', 'us', 'america', 'north america',
+    'europe', 'european', 'eu', 'asia', 'china', 'japan',
+    'south korea', 'india', 'russia', 'africa', 'global',
+    'worldwide', 'international'
+], whole_words=True)
+
+_ATTACK_TYPES = KeywordMatcher([
+    ('phishing', ['phishing', 'social engineering']),
+    ('smart_contract_exploit', ['smart contract', 'code exploit', 'vulnerability']),
+    ('flash_loan_attack', ['flash loan', 'flashloan']),
+    ('governance_attack', ['governance', 'voting manipulation']),
+    ('bridge_exploit', ['bridge', 'cross-chain attack']),
+    ('rug_pull', ['rug pull', 'exit scam']),
+    ('oracle_manipulation', ['oracle', 'price manipulation']),
+    ('exchange_hack', ['exchange hack', 'centralized exchange']),
+])
+
+_BLOCKCHAINS = KeywordMatcher.from_keywords([
+    'ethereum', 'bitcoin', 'polygon', 'binance smart chain', 'bsc',
+    'avalanche', 'fantom', 'arbitrum', 'optimism', 'solana',
+    'cardano', 'polkadot', 'cosmos', 'terra', 'harmony',
+    'near', 'algorand', 'tezos'
+], whole_words=True)
+
+# Article field selectors, tried in priority order
+_TITLE_SELECTORS = compile_selectors(
+    'h1.entry-title',
+    'h1.post-title',
+    'h1',
+    '.blog-post-title',
+    '.article-title',
+    'title'
+)
+
+_CONTENT_SELECTORS = compile_selectors(
+    '.entry-content',
+    '.post-content',
+    '.blog-post-content',
+    '.article-content',
+    'main .content',
+    '.post-body'
+)
+
+_DATE_SELECTORS = compile_selectors(
+    'time[datetime]',
+    'time',
+    '.published-date',
+    '.post-date',
+    '.entry-date',
+    '.article-date',
+    '.date',
+    '[class*="date"]',
+    '[class*="time"]',
+    '.post-meta time',
+    '.meta-date',
+    '.byline time',
+    '.blog-post-date'
+)
+
+_META_DATE_SELECTORS = compile_selectors(
+    'meta[property="article:published_time"]',
+    'meta[name="publishdate"]',
+    'meta[name="date"]',
+    'meta[property="og:updated_time"]'
+)
+
+# Structured article metadata embedded by the blog's CMS
+_JSON_LD = XPath('//script[@type="application/ld+json"]/text()')
+_JSON_LD_ARTICLE_TYPES = frozenset({'Article', 'BlogPosting', 'NewsArticle', 'TechArticle'})
+
+# Elements stripped from article content before extracting its text
+_UNWANTED_CONTENT = XPath(
+    './/script | .//style | .//template | .//nav | .//aside'
+    ' | .//*[contains(concat(" ", normalize-space(@class), " "), " share-buttons ")]'
+)
+
+# Severity score by risk level, and bonuses for large losses (largest first)
+_BASE_SEVERITY_SCORES = {
+    RiskLevel.LOW: 3.0,
+    RiskLevel.MEDIUM: 5.0,
+    RiskLevel.HIGH: 7.0,
+    RiskLevel.CRITICAL: 8.5
+}
+_AMOUNT_SCORE_BONUSES = (
+    (50_000_000, 1.0),  # $50M+
+    (5_000_000, 0.5),  # $5M+
+)
+
+class ChainalysisArticleParser(ArticleParser):
+    """Extracts report fields from Chainalysis blog article pages"""
+    
+    def parse(self, content: str) -> Optional[Dict[str, Any]]:
+        """Extract the article fields from a Chainalysis blog page"""
+        tree = parse_lxml(content)
+        
+        # Extract article data
+        # Prefer JSON-LD metadata and fall back to HTML heuristics per field
+        article_ld = self._extract_json_ld(tree)
+        title = self._json_ld_title(article_ld) or self._extract_title(tree)
+        description = self._json_ld_description(article_ld) or self._extract_description(tree)
+        
+        if not title or not description:
+            return None
+        
+        # Lowercase once; the keyword helpers below all expect lowercased text
+        description_lower = description.lower()
+        text_lower = f"{title.lower()} {description_lower}"
+        
+        amount_lost = self.extract_amount_lost(text_lower)
+        
+        # Assess risk level (Chainalysis articles are typically analytical)
+        risk_level = self.assess_risk_level(
+            amount_lost=amount_lost,
+            text_lower=text_lower
+        )
+        
+        # Extract tags
+        tags = self.extract_tags(text_lower)
+        tags.extend(['analysis', 'research'])  # Chainalysis specific tags
+        
+        # Additional data specific to Chainalysis
+        additional_data = {
+            "analysis_type": self._extract_analysis_type(description_lower),
+            "data_source": "chainalysis",
+            "report_type": self._extract_report_type(text_lower),
+            "geographical_focus": self._extract_geographical_focus(description_lower)
+        }
+        
+        return {
+            "title": title,
+            "description": description,
+            "risk_level": risk_level,
+            "published_date": self._json_ld_date(article_ld) or self._extract_published_date(tree),
+            "tags": tags,
+            "amount_lost": amount_lost,
+            "attack_type": self._extract_attack_type(description_lower),
+            "blockchain": self._extract_blockchain(description_lower),
+            "severity_score": self._calculate_severity_score(amount_lost, risk_level),
+            "additional_data": additional_data
+        }
+    
+    def _extract_json_ld(self, tree) -> dict:
+        """Return the first Article-like JSON-LD object on the page, if any"""
+        for payload in _JSON_LD(tree):
+            try:
+                data = orjson.loads(str(payload))
+            except orjson.JSONDecodeError:
+                continue
+            
+            candidates = data if isinstance(data, list) else [data]
+            for candidate in list(candidates):
+                if isinstance(candidate, dict) and isinstance(candidate.get('@graph'), list):
+                    candidates.extend(candidate['@graph'])
+            
+            for candidate in candidates:
+                if not isinstance(candidate, dict):
+                    continue
+                ld_type = candidate.get('@type')
+                ld_types = ld_type if isinstance(ld_type, list) else [ld_type]
+                if _JSON_LD_ARTICLE_TYPES.intersection(t for t in ld_types if isinstance(t, str)):
+                    return candidate
+        
+        return {}
+    
+    def _json_ld_title(self, article_ld: dict) -> Optional[str]:
+        """Article headline from JSON-LD, subject to the HTML title's length check"""
+        headline = article_ld.get('headline')
+        if isinstance(headline, str):
+            headline = headline.strip()
+            if len(headline) > 10:
+                return headline
+        return None
+    
+    def _json_ld_description(self, article_ld: dict) -> Optional[str]:
+        """Article body from JSON-LD, subject to the HTML content's length check"""
+        body = article_ld.get('articleBody')
+        if isinstance(body, str):
+            text = ' '.join(body.split())
+            if len(text) > 200:
+                return text[:1500]  # Limit to first 1500 characters
+        return None
+    
+    def _json_ld_date(self, article_ld: dict) -> Optional[date]:
+        """Published date from JSON-LD"""
+        published = article_ld.get('datePublished')
+        if not isinstance(published, str):
+            return None
+        try:
+            return datetime.fromisoformat(published).date()
+        except ValueError:
+            try:
+                return date_parse(published).date()
+            except (ValueError, OverflowError):
+                return None
+    
+    def _extract_title(self, tree) -> Optional[str]:
+        """Extract article title"""
+        for selector in _TITLE_SELECTORS:
+            element = select_one(tree, selector)
+            if element is not None:
+                title = element_text(element)
+                if title and len(title) > 10:
+                    return title
+        
+        return None
+    
+    def _extract_description(self, tree) -> Optional[str]:
+        """Extract article description/content"""
+        for selector in _CONTENT_SELECTORS:
+            element = select_one(tree, selector)
+            if element is not None:
+                text = content_text(element, _UNWANTED_CONTENT, max_chars=1500)  # Limit to first 1500 characters
+                if text and len(text) > 200:
+                    return text
+        
+        return None
+    
+    def _extract_published_date(self, tree) -> Optional[date]:
+        """Extract published date from article"""
+        for selector in _DATE_SELECTORS:
+            elements = selector(tree)
+            for element in elements:
+                # Try datetime attribute
+                datetime_attr = element.get('datetime')
+                if datetime_attr:
+                    try:
+                        # fromisoformat covers ISO 8601 (including a 'Z' suffix) on 3.11+
+                        return datetime.fromisoformat(datetime_attr).date()
+                    except ValueError as e:
+                        logger.debug(f"Failed to parse datetime attribute '{datetime_attr}': {e}")
+                        try:
+                            return date_parse(datetime_attr).date()
+                        except (ValueError, OverflowError):
+                            pass
+                
+                # Try text content
+                date_text = element_text(element)
+                if date_text and len(date_text) > 4:
+                    # Clean the text
+                    date_text = DATE_NOISE_PATTERN.sub('', date_text).strip()
+                    date_text = WHITESPACE_PATTERN.sub(' ', date_text)
+                    
+                    # dateutil already covers the ISO, month-name and numeric
+                    # formats a strptime cascade would try
+                    try:
+                        return date_parse(date_text).date()
+                    except (ValueError, OverflowError) as e:
+                        logger.debug(f"Failed to parse date text '{date_text}': {e}")
+        
+        for selector in _META_DATE_SELECTORS:
+            element = select_one(tree, selector)
+            if element is not None:
+                content = element.get('content')
+                if content:
+                    try:
+                        parsed_datetime = date_parse(content)
+                        return parsed_datetime.date()  # Return only date component
+                    except:
+                        pass
+        
+        # Fallback: look for date patterns in the page
+        if self.scan_page_for_dates:
+            page_text = element_text(tree, strip=False)
+            for pattern in PAGE_DATE_PATTERNS:
+                # finditer stops scanning the page at the first match that parses
+                for match in pattern.finditer(page_text):
+                    try:
+                        return date_parse(' '.join(match.groups())).date()  # Return only date component
+                    except (ValueError, OverflowError):
+                        continue
+        
+        logger.debug("No published date found for Chainalysis article")
+        return None
+    
+    def _extract_analysis_type(self, text_lower: str) -> Optional[str]:
+        """Extract type of analysis from lowercased text"""
+        return _ANALYSIS_TYPES.first(text_lower) or 'general_analysis'
+    
+    def _extract_report_type(self, text: str) -> Optional[str]:
+        """Extract report type from lowercased title and description text"""
+        
+        if 'report' in text:
+            return _REPORT_PERIODS.first(text) or 'research_report'
+        elif 'analysis' in text:
+            return 'analysis'
+        elif _INSIGHT_KEYWORDS.matches(text):
+            return 'insights'
+        else:
+            return 'blog_post'
+    
+    def _extract_geographical_focus(self, text_lower: str) -> Optional[str]:
+        """Extract geographical focus from lowercased text"""
+        geo = _GEO_REGIONS.first(text_lower)
+        return geo.title() if geo else None
+    
+    def _extract_attack_type(self, text_lower: str) -> Optional[str]:
+        """Extract attack type from lowercased text"""
+        return _ATTACK_TYPES.first(text_lower)
+    
+    def _extract_blockchain(self, text_lower: str) -> Optional[str]:
+        """Extract blockchain network from lowercased text"""
+        blockchain = _BLOCKCHAINS.first(text_lower)
+        return blockchain.title() if blockchain else None
+    
+    def _calculate_severity_score(self, amount_lost: Optional[float], risk_level: RiskLevel) -> float:
+        """Calculate severity score (Chainalysis articles are typically analytical)"""
+        score = _BASE_SEVERITY_SCORES.get(risk_level, 2.0)
+        
+        # Adjust based on amount lost
+        if amount_lost:
+            for threshold, bonus in _AMOUNT_SCORE_BONUSES:
+                if amount_lost >= threshold:
+                    score = min(10.0, score + bonus)
+                    break
+        
+        return score
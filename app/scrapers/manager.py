@@ -2,16 +2,18 @@ import asyncio
 import aiohttp
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-import hashlib
 import json
 from urllib.parse import urljoin, urlparse
+from xxhash import xxh128_hexdigest
 
 from app.scrapers.rekt_scraper import RektScraper
 from app.scrapers.chainalysis_scraper import ChainanalysisScraper
 from app.scrapers.base_scraper import BaseScraper
+from app.scrapers.parsing import shutdown_parse_pool
 from app.models.threat_intel import ThreatIntelItem, RiskLevel
-from app.database.database import SessionLocal, ThreatIntelDB
+from app.database.database import AsyncSessionLocal, bulk_upsert
 from app.services.protocol_classifier import protocol_classifier
+from app.utils.cache import invalidate_data_caches
 from app.utils.logger import logger
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
@@ -34,7 +36,17 @@ class ScraperManager:
     
     async def initialize(self):
         """Initialize the scraper manager"""
+        # One long-lived session shared by every scraper so keep-alive
+        # connections (and their TLS handshakes) are reused across requests
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=8,
+            use_dns_cache=True,
+            ttl_dns_cache=600,
+            keepalive_timeout=75
+        )
         self.session = aiohttp.ClientSession(
+            connector=connector,
             timeout=aiohttp.ClientTimeout(total=30),
             headers={"User-Agent": "DeFiGuard-OSINT-Bot/1.0"}
         )
@@ -53,6 +65,15 @@ class ScraperManager:
         
         for scraper in self.scrapers.values():
             await scraper.close()
+        
+        shutdown_parse_pool()
+    
+    def prune_caches(self) -> int:
+        """Drop expired entries from every scraper's article cache"""
+        removed = 0
+        for scraper in self.scrapers.values():
+            removed += scraper.prune_article_cache()
+        return removed
     
     def get_available_sources(self) -> List[str]:
         """Get list of available scraper sources"""
@@ -60,36 +81,12 @@ class ScraperManager:
     
     async def scrape_all_sources(self) -> Dict[str, Any]:
         """Scrape all available sources"""
-        results = {}
-        
-        for source_name, scraper in self.scrapers.items():
-            try:
-                logger.info(f"Starting scrape for source: {source_name}")
-                items = await scraper.scrape()
-                
-                # Save items to database
-                saved_count = await self._save_items_to_db(items, source_name)
-                
-                results[source_name] = {
-                    "status": "success",
-                    "items_scraped": len(items),
-                    "items_saved": saved_count
-                }
-                
-                logger.info(f"Completed scrape for {source_name}: {len(items)} items found, {saved_count} saved")
-                
-            except Exception as e:
-                logger.error(f"Error scraping {source_name}: {str(e)}")
-                results[source_name] = {
-                    "status": "error",
-                    "error": str(e)
-                }
-        
-        return results
+        return await self.scrape_sources(list(self.scrapers.keys()))
     
     async def scrape_sources(self, source_names: List[str]) -> Dict[str, Any]:
-        """Scrape specific sources"""
+        """Scrape specific sources concurrently"""
         results = {}
+        available = []
         
         for source_name in source_names:
             if source_name not in self.scrapers:
@@ -97,93 +94,69 @@ class ScraperManager:
                     "status": "error",
                     "error": f"Source '{source_name}' not available"
                 }
-                continue
-            
-            try:
-                logger.info(f"Starting scrape for source: {source_name}")
-                scraper = self.scrapers[source_name]
-                items = await scraper.scrape()
-                
-                # Save items to database
-                saved_count = await self._save_items_to_db(items, source_name)
-                
-                results[source_name] = {
-                    "status": "success",
-                    "items_scraped": len(items),
-                    "items_saved": saved_count
-                }
-                
-                logger.info(f"Completed scrape for {source_name}: {len(items)} items found, {saved_count} saved")
-                
-            except Exception as e:
-                logger.error(f"Error scraping {source_name}: {str(e)}")
-                results[source_name] = {
-                    "status": "error",
-                    "error": str(e)
-                }
+            else:
+                available.append(source_name)
         
-        return results
-    
-    async def _save_items_to_db(self, items: List[ThreatIntelItem], source_name: str) -> int:
-        """Save scraped items to database"""
-        db = SessionLocal()
-        saved_count = 0
+        # Sources are independent and I/O bound, so their fetches overlap;
+        # _scrape_source never raises, so one failure can't cancel the rest
+        outcomes = await asyncio.gather(*(self._scrape_source(name) for name in available))
+        results.update(zip(available, outcomes))
         
+        return {source_name: results[source_name] for source_name in source_names}
+    
+    async def _scrape_source(self, source_name: str) -> Dict[str, Any]:
+        """Scrape one source and save its items, returning the result summary"""
         try:
-            for item in items:
-                # Generate unique ID based on source URL
-                item_id = hashlib.md5(str(item.source_url).encode()).hexdigest()
-                
-                # Check if item already exists
-                existing = db.query(ThreatIntelDB).filter(
-                    ThreatIntelDB.source_url == str(item.source_url)
-                ).first()
-                
-                if existing:
-                    # Update existing item if it's newer
-                    if item.scraped_date > existing.scraped_date:
-                        # Convert Pydantic model to dict and handle URL conversion
-                        item_data = item.dict()
-                        item_data['source_url'] = str(item.source_url)  # Convert URL to string
-                        
-                        for key, value in item_data.items():
-                            if key != "id" and value is not None:
-                                setattr(existing, key, value)
-                        existing.scraped_date = datetime.utcnow()
-                        saved_count += 1
-                        logger.debug(f"Updated existing item: {item.title}")
-                else:
-                    # Create new item
-                    db_item = ThreatIntelDB(
-                        id=item_id,
-                        title=item.title,
-                        description=item.description,
-                        protocol_name=item.protocol_name,
-                        risk_level=item.risk_level.value,
-                        source_url=str(item.source_url),
-                        source_name=source_name,
-                        published_date=item.published_date,
-                        scraped_date=datetime.utcnow(),
-                        tags=item.tags,
-                        amount_lost=item.amount_lost,
-                        attack_type=item.attack_type,
-                        blockchain=item.blockchain,
-                        severity_score=item.severity_score,
-                        is_verified=item.is_verified,
-                        additional_data=item.additional_data
-                    )
-                    db.add(db_item)
-                    saved_count += 1
-                    logger.debug(f"Created new item: {item.title}")
+            logger.info(f"Starting scrape for source: {source_name}")
+            items = await self.scrapers[source_name].scrape()
+            
+            # Save items to database
+            saved_count = await self._save_items_to_db(items, source_name)
             
-            db.commit()
-            logger.info(f"Saved {saved_count} items to database for source: {source_name}")
+            logger.info(f"Completed scrape for {source_name}: {len(items)} items found, {saved_count} saved")
+            
+            return {
+                "status": "success",
+                "items_scraped": len(items),
+                "items_saved": saved_count
+            }
             
         except Exception as e:
-            db.rollback()
-            logger.error(f"Error saving items to database: {str(e)}")
-            raise
-        finally:
-            db.close()
+            logger.error(f"Error scraping {source_name}: {str(e)}")
+            return {
+                "status": "error",
+                "error": str(e)
+            }
+    
+    async def _save_items_to_db(self, items: List[ThreatIntelItem], source_name: str) -> int:
+        """Save scraped items to database"""
+        # One timestamp for the whole batch
+        scraped_date = datetime.utcnow()
+        rows = []
+        for item in items:
+            row = item.model_dump()
+            row['source_url'] = str(item.source_url)
+            # Generate unique ID based on source URL
+            row['id'] = xxh128_hexdigest(row['source_url'].encode())
+            row['source_name'] = source_name
+            row['scraped_date'] = scraped_date
+            rows.append(row)
+        
+        # The async session keeps the event loop free while the batch is
+        # written, so other sources' fetches carry on during the commit
+        async with AsyncSessionLocal() as db:
+            try:
+                # Single INSERT ... ON CONFLICT (source_url) DO UPDATE for the batch
+                saved_count = await db.run_sync(bulk_upsert, rows)
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Error saving items to database: {str(e)}")
+                raise
+        
+        if saved_count:
+            # Cached aggregates and ETags are stale once new rows land
+            invalidate_data_caches()
+        logger.info(f"Saved {saved_count} items to database for source: {source_name}")
         
         return saved_count
@@ -0,0 +1,282 @@
+"""
+Article parsing shared by the scrapers
+
+Parsing runs in worker processes, so this module and the per-source parser
+modules must stay free of the database, the protocol classifier and the
+application's logging setup; a spawned worker imports only what it needs to
+unpickle a parser class.
+"""
+
+import abc
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterable, List, Optional, Dict, Any, Tuple, Type
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+from lxml.etree import XPath
+from loguru import logger
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+import re
+
+from app.config import classify_amount
+from app.models.threat_intel import RiskLevel
+from app.utils.keywords import KeywordMatcher
+
+# Common DeFi protocol names, matched as whole words in list order
+_DEFI_PROTOCOLS = KeywordMatcher.from_keywords([
+    'uniswap', 'compound', 'aave', 'makerdao', 'curve', 'yearn', 'synthetix',
+    'balancer', 'sushiswap', 'pancakeswap', '1inch', 'kyber', 'bancor',
+    'cream', 'alpha', 'harvest', 'pickle', 'badger', 'convex', 'frax',
+    'olympus', 'wonderland', 'tomb', 'spell', 'rari', 'fuse', 'iron',
+    'mirror', 'anchor', 'terra', 'polygon', 'arbitrum', 'optimism',
+    'avalanche', 'fantom', 'bsc', 'harmony'
+], whole_words=True)
+
+# Risk indicator keywords, most severe level first
+_RISK_KEYWORDS = KeywordMatcher([
+    (RiskLevel.CRITICAL.value, ['critical', 'emergency', 'immediate', 'urgent', 'exploit']),
+    (RiskLevel.HIGH.value, ['hack', 'attack', 'vulnerability', 'breach', 'stolen', 'drained']),
+    (RiskLevel.MEDIUM.value, ['warning', 'risk', 'issue', 'concern', 'potential']),
+])
+
+_TAG_KEYWORDS = KeywordMatcher([
+    ('exploit', ['exploit', 'attack', 'hack']),
+    ('vulnerability', ['vulnerability', 'bug', 'flaw']),
+    ('defi', ['defi', 'decentralized finance']),
+    ('smart_contract', ['smart contract', 'contract']),
+    ('flash_loan', ['flash loan', 'flashloan']),
+    ('rug_pull', ['rug pull', 'rugpull', 'exit scam']),
+    ('governance', ['governance', 'voting', 'proposal']),
+    ('oracle', ['oracle', 'price feed']),
+    ('bridge', ['bridge', 'cross-chain']),
+    ('token', ['token', 'cryptocurrency', 'crypto']),
+])
+
+# Fallback patterns for protocol names not in the known-protocol list
+_PROTOCOL_PATTERNS = (
+    re.compile(r'(\w+)\s+(?:protocol|finance|swap|dao)'),
+    re.compile(r'(?:protocol|finance|swap|dao)\s+(\w+)'),
+    re.compile(r'(\w+)\s+(?:exploit|hack|attack)'),
+)
+
+# Currency amounts with an optional unit suffix, matched in a single pass
+_AMOUNT_RE = re.compile(r'\$?([\d,]+(?:\.\d{2})?)(?:\s*(?P<unit>billion|million|thousand|b|m|k)\b)?')
+
+# Unit suffix -> (priority, multiplier). Millions are preferred, then
+# billions, thousands and finally bare numbers.
+_AMOUNT_UNITS = {
+    'million': (0, 1_000_000),
+    'm': (0, 1_000_000),
+    'billion': (1, 1_000_000_000),
+    'b': (1, 1_000_000_000),
+    'thousand': (2, 1_000),
+    'k': (2, 1_000),
+    None: (3, 1),
+}
+
+# Shared by the scrapers' published-date extraction
+DATE_NOISE_PATTERN = re.compile(r'(Posted|Published|on|at|by|•|·)', re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+PAGE_DATE_PATTERNS = (
+    re.compile(r'\b(\d{4})-(\d{2})-(\d{2})\b'),
+    re.compile(r'\b(\w+)\s+(\d{1,2}),?\s+(\d{4})\b'),
+    re.compile(r'\b(\d{1,2})\s+(\w+)\s+(\d{4})\b'),
+)
+
+# Text nodes as BeautifulSoup's get_text() sees them (no script/style content)
+_TEXT_NODES = XPath('.//text()[not(ancestor::script or ancestor::style or ancestor::template)]')
+
+# Elements whose text never belongs in extracted content
+NON_TEXT_TAGS = ['script', 'style', 'template']
+NON_TEXT_CONTENT = XPath(' | '.join(f'.//{tag}' for tag in NON_TEXT_TAGS))
+
+def content_text(
+    element: lxml_html.HtmlElement,
+    unwanted: XPath = NON_TEXT_CONTENT,
+    max_chars: Optional[int] = None
+) -> str:
+    """Return whitespace-normalized text of element after dropping unwanted descendants
+
+    With max_chars, text nodes are read only until the result is long enough
+    and the result is truncated to max_chars.
+    """
+    for node in unwanted(element):
+        node.drop_tree()
+    if max_chars is None:
+        return ' '.join(element.text_content().split())
+    return _normalized_prefix(element.itertext(), max_chars)
+
+def lexbor_text(node: LexborNode, max_chars: int) -> str:
+    """Return the first max_chars of a lexbor node's whitespace-normalized text
+
+    Equivalent to ' '.join(node.text().split())[:max_chars], but text nodes
+    are only read until the result is long enough.
+    """
+    chunks = (
+        child.text_content or ''
+        for child in node.traverse(include_text=True)
+        if child.tag == '-text'
+    )
+    return _normalized_prefix(chunks, max_chars)
+
+def _normalized_prefix(chunks: Iterable[str], max_chars: int) -> str:
+    # Normalizing a prefix of the text yields a prefix of the normalized text,
+    # so reading can stop once the non-whitespace characters alone suffice
+    read = []
+    visible = 0
+    for chunk in chunks:
+        read.append(chunk)
+        visible += sum(map(len, chunk.split()))
+        if visible >= max_chars:
+            break
+    return ' '.join(''.join(read).split())[:max_chars]
+
+def parse_lexbor(content: str) -> LexborHTMLParser:
+    """Parse HTML content with lexbor for CSS-selector extraction"""
+    return LexborHTMLParser(content)
+
+def parse_lxml(content: str) -> lxml_html.HtmlElement:
+    """Parse HTML content into an lxml tree for XPath-based extraction"""
+    try:
+        return lxml_html.document_fromstring(content)
+    except ValueError:
+        # lxml rejects str input that carries an XML encoding declaration
+        return lxml_html.document_fromstring(content.encode('utf-8'))
+
+def compile_selectors(*selectors: str) -> Tuple[CSSSelector, ...]:
+    """Compile CSS selectors to lxml XPath evaluators once, at import time"""
+    return tuple(CSSSelector(selector) for selector in selectors)
+
+def select_one(tree: lxml_html.HtmlElement, selector: CSSSelector) -> Optional[lxml_html.HtmlElement]:
+    """Return the first element matching a compiled selector, or None"""
+    elements = selector(tree)
+    return elements[0] if elements else None
+
+def element_text(element: lxml_html.HtmlElement, strip: bool = True) -> str:
+    """Return an element's text, matching BeautifulSoup's get_text(strip=...)"""
+    if strip:
+        return ''.join(text.strip() for text in _TEXT_NODES(element))
+    return ''.join(_TEXT_NODES(element))
+
+class ArticleParser(abc.ABC):
+    """Page parsing and keyword extraction shared by every source"""
+    
+    # Whether date extraction may fall back to scanning the whole page text
+    # for date-like strings when no date element or meta tag matched
+    scan_page_for_dates = True
+    
+    @abc.abstractmethod
+    def parse(self, content: str) -> Optional[Dict[str, Any]]:
+        """Extract ThreatIntelItem fields from an article page
+
+        Runs in a worker process, so it must only use the page content and
+        module-level state, and return picklable values. Returns None when the
+        page has no usable title or description.
+        """
+        pass
+    
+    def extract_protocol_name(self, text_lower: str) -> Optional[str]:
+        """Extract DeFi protocol name from lowercased text using common patterns"""
+        protocol = _DEFI_PROTOCOLS.first(text_lower)
+        if protocol:
+            return protocol.title()
+        
+        # Try to extract from common patterns
+        for pattern in _PROTOCOL_PATTERNS:
+            match = pattern.search(text_lower)
+            if match:
+                potential_protocol = match.group(1)
+                if len(potential_protocol) > 2:  # Avoid very short matches
+                    return potential_protocol.title()
+        
+        return None
+    
+    def assess_risk_level(self, amount_lost: Optional[float] = None,
+                         keywords: List[str] = None,
+                         text_lower: str = "") -> RiskLevel:
+        """Assess risk level from the amount lost and lowercased article text"""
+        keywords = keywords or []
+        
+        # Check amount lost against the configured thresholds
+        if amount_lost:
+            amount_level = classify_amount(amount_lost)
+            if amount_level != RiskLevel.LOW.value:
+                return RiskLevel(amount_level)
+        
+        # Check keywords
+        keyword_level = _RISK_KEYWORDS.first(text_lower)
+        if keyword_level:
+            return RiskLevel(keyword_level)
+        
+        return RiskLevel.LOW
+    
+    def extract_amount_lost(self, text_lower: str) -> Optional[float]:
+        """Extract monetary amount lost from lowercased text"""
+        # First reasonable amount (> $1000) seen for each unit priority
+        found: List[Optional[float]] = [None] * 4
+        
+        for match in _AMOUNT_RE.finditer(text_lower):
+            priority, multiplier = _AMOUNT_UNITS[match.group('unit')]
+            if found[priority] is not None:
+                continue
+            
+            try:
+                amount = float(match.group(1).replace(',', '')) * multiplier
+            except ValueError:
+                continue
+            
+            if amount > 1000:
+                if priority == 0:
+                    return amount
+                found[priority] = amount
+        
+        return next((amount for amount in found if amount is not None), None)
+    
+    def extract_tags(self, text_lower: str) -> List[str]:
+        """Extract relevant tags from lowercased title and description text"""
+        return _TAG_KEYWORDS.ordered_labels(text_lower)
+
+# Article parsing and keyword extraction are CPU bound, so they run in worker
+# processes instead of on the event loop. Created on first use.
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+# A scrape cycle parses a few dozen pages of a few ms each, so a handful of
+# workers is plenty and keeps per-process start-up cost bounded
+_MAX_PARSE_WORKERS = 4
+
+def _init_worker():
+    # The parent process owns the log file and its rotation; workers only
+    # report to the console
+    logger.remove()
+    logger.add(sys.stdout, level="INFO")
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Return the shared article parsing pool, starting it if needed"""
+    global _parse_pool
+    if _parse_pool is None:
+        # spawn, not fork: the parent holds live sockets, threads and DB pools
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=min(_MAX_PARSE_WORKERS, os.cpu_count() or 1),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker
+        )
+    return _parse_pool
+
+def shutdown_parse_pool():
+    """Stop the article parsing pool's worker processes"""
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(cancel_futures=True)
+        _parse_pool = None
+
+@lru_cache(maxsize=None)
+def _worker_parser(parser_cls: Type[ArticleParser]) -> ArticleParser:
+    # One instance per parser class and worker process
+    return parser_cls()
+
+def parse_in_worker(parser_cls: Type[ArticleParser], content: str) -> Optional[Dict[str, Any]]:
+    """Worker entry point: parse an article page with parser_cls"""
+    return _worker_parser(parser_cls).parse(content)
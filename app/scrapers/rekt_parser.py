@@ -0,0 +1,253 @@
+"""
+Article page parsing for Rekt News; runs in the scraper's parsing worker
+processes
+"""
+
+from typing import Any, Dict, Optional
+from datetime import datetime, date
+
+from dateutil.parser import parse as date_parse
+from loguru import logger
+from selectolax.lexbor import LexborHTMLParser
+
+from app.scrapers.parsing import (
+    ArticleParser, DATE_NOISE_PATTERN, WHITESPACE_PATTERN, PAGE_DATE_PATTERNS, NON_TEXT_TAGS,
+    lexbor_text, parse_lexbor
+)
+from app.models.threat_intel import RiskLevel
+from app.utils.keywords import KeywordMatcher
+
+# Checked in order; the first attack vector with a matching keyword wins
+_ATTACK_VECTORS = KeywordMatcher([
+    ('flash_loan', ['flash loan', 'flashloan']),
+    ('reentrancy', ['reentrancy', 're-entrancy']),
+    ('oracle_manipulation', ['oracle', 'price manipulation']),
+    ('governance_attack', ['governance', 'voting']),
+    ('smart_contract_bug', ['bug', 'vulnerability', 'exploit']),
+    ('rug_pull', ['rug pull', 'exit scam']),
+    ('bridge_exploit', ['bridge', 'cross-chain']),
+    ('front_running', ['front running', 'mev']),
+])
+
+_BLOCKCHAINS = KeywordMatcher.from_keywords([
+    'ethereum', 'eth', 'polygon', 'matic', 'bsc', 'binance smart chain',
+    'avalanche', 'avax', 'fantom', 'ftm', 'arbitrum', 'optimism',
+    'solana', 'sol', 'terra', 'luna', 'harmony', 'one'
+], whole_words=True)
+
+_POST_MORTEM_KEYWORDS = KeywordMatcher.from_keywords([
+    'post-mortem', 'postmortem', 'analysis', 'detailed breakdown',
+    'technical analysis', 'how it happened'
+])
+
+# Article field selectors, tried in priority order (lexbor compiles CSS natively)
+_TITLE_SELECTORS = (
+    'h1',
+    '.post-title',
+    '.article-title',
+    'title',
+    '[class*="title"]'
+)
+
+_CONTENT_SELECTORS = (
+    '.post-content',
+    '.article-content',
+    '.content',
+    'main',
+    '[class*="content"]'
+)
+
+_DATE_SELECTORS = (
+    'time[datetime]',
+    'time',
+    '.published-date',
+    '.post-date',
+    '.entry-date',
+    '.article-date',
+    '.date',
+    '[class*="date"]',
+    '[class*="time"]',
+    '.post-meta time',
+    '.meta-date',
+    '.byline time'
+)
+
+_META_DATE_SELECTORS = (
+    'meta[property="article:published_time"]',
+    'meta[name="publishdate"]',
+    'meta[name="date"]',
+    'meta[property="og:updated_time"]'
+)
+
+# Severity score by risk level, and bonuses for large losses (largest first)
+_BASE_SEVERITY_SCORES = {
+    RiskLevel.LOW: 2.0,
+    RiskLevel.MEDIUM: 5.0,
+    RiskLevel.HIGH: 7.5,
+    RiskLevel.CRITICAL: 9.0
+}
+_AMOUNT_SCORE_BONUSES = (
+    (100_000_000, 1.0),  # $100M+
+    (10_000_000, 0.5),  # $10M+
+)
+
+class RektArticleParser(ArticleParser):
+    """Extracts incident fields from Rekt News article pages"""
+    
+    # Article pages always carry structured dates; a page-wide scan would
+    # only pick up dates quoted in the post body or the footer
+    scan_page_for_dates = False
+    
+    def parse(self, content: str) -> Optional[Dict[str, Any]]:
+        """Extract the article fields from a Rekt News page"""
+        tree = parse_lexbor(content)
+        # Script/style text never belongs in any extracted field
+        tree.strip_tags(NON_TEXT_TAGS)
+        
+        # Extract article data
+        title = self._extract_title(tree)
+        description = self._extract_description(tree)
+        
+        if not title or not description:
+            return None
+        
+        # Lowercase once; the keyword helpers below all expect lowercased text
+        description_lower = description.lower()
+        text_lower = f"{title.lower()} {description_lower}"
+        
+        amount_lost = self.extract_amount_lost(text_lower)
+        
+        # Assess risk level
+        risk_level = self.assess_risk_level(
+            amount_lost=amount_lost,
+            text_lower=text_lower
+        )
+        
+        # Additional data specific to Rekt
+        additional_data = {
+            "attack_vector": self._extract_attack_vector(description_lower),
+            "blockchain_network": self._extract_blockchain(description_lower),
+            "post_mortem": self._has_post_mortem(description_lower)
+        }
+        
+        return {
+            "title": title,
+            "description": description,
+            "risk_level": risk_level,
+            "published_date": self._extract_published_date(tree),
+            "tags": self.extract_tags(text_lower),
+            "amount_lost": amount_lost,
+            "attack_type": additional_data["attack_vector"],
+            "blockchain": additional_data["blockchain_network"],
+            "severity_score": self._calculate_severity_score(amount_lost, risk_level),
+            "additional_data": additional_data
+        }
+    
+    def _extract_title(self, tree: LexborHTMLParser) -> Optional[str]:
+        """Extract article title"""
+        for selector in _TITLE_SELECTORS:
+            element = tree.css_first(selector)
+            if element is not None:
+                title = element.text(strip=True)
+                if title and len(title) > 10:  # Reasonable title length
+                    return title
+        
+        return None
+    
+    def _extract_description(self, tree: LexborHTMLParser) -> Optional[str]:
+        """Extract article description/content"""
+        for selector in _CONTENT_SELECTORS:
+            element = tree.css_first(selector)
+            if element is not None:
+                text = lexbor_text(element, 1000)  # Limit to first 1000 characters
+                if text and len(text) > 100:  # Reasonable content length
+                    return text
+        
+        # Fallback to body text
+        if tree.body is not None:
+            text = lexbor_text(tree.body, 1000)
+            return text or None
+        
+        return None
+    
+    def _extract_published_date(self, tree: LexborHTMLParser) -> Optional[date]:
+        """Extract published date from article"""
+        for selector in _DATE_SELECTORS:
+            for element in tree.css(selector):
+                # Try datetime attribute first
+                datetime_attr = element.attributes.get('datetime')
+                if datetime_attr:
+                    try:
+                        # fromisoformat covers ISO 8601 (including a 'Z' suffix) on 3.11+
+                        return datetime.fromisoformat(datetime_attr).date()
+                    except ValueError as e:
+                        logger.debug(f"Failed to parse datetime attribute '{datetime_attr}': {e}")
+                        try:
+                            return date_parse(datetime_attr).date()
+                        except (ValueError, OverflowError):
+                            pass
+                
+                # Try text content
+                date_text = element.text(strip=True)
+                if date_text and len(date_text) > 4:  # Minimum reasonable date length
+                    # Clean the text
+                    date_text = DATE_NOISE_PATTERN.sub('', date_text).strip()
+                    date_text = WHITESPACE_PATTERN.sub(' ', date_text)
+                    
+                    # dateutil already covers the ISO, month-name and numeric
+                    # formats a strptime cascade would try
+                    try:
+                        return date_parse(date_text).date()
+                    except (ValueError, OverflowError) as e:
+                        logger.debug(f"Failed to parse date text '{date_text}': {e}")
+        
+        for selector in _META_DATE_SELECTORS:
+            element = tree.css_first(selector)
+            if element is not None:
+                content = element.attributes.get('content')
+                if content:
+                    try:
+                        parsed_date = date_parse(content)
+                        return parsed_date.date()  # Return only date component
+                    except:
+                        pass
+        
+        # Fallback: look for date patterns in the entire page
+        if self.scan_page_for_dates and tree.root is not None:
+            page_text = tree.root.text()
+            for pattern in PAGE_DATE_PATTERNS:
+                # finditer stops scanning the page at the first match that parses
+                for match in pattern.finditer(page_text):
+                    try:
+                        return date_parse(' '.join(match.groups())).date()  # Return only date component
+                    except (ValueError, OverflowError):
+                        continue
+        
+        logger.debug("No published date found")
+        return None
+    
+    def _extract_attack_vector(self, text_lower: str) -> Optional[str]:
+        """Extract attack vector from lowercased text"""
+        return _ATTACK_VECTORS.first(text_lower)
+    
+    def _extract_blockchain(self, text_lower: str) -> Optional[str]:
+        """Extract blockchain network from lowercased text"""
+        blockchain = _BLOCKCHAINS.first(text_lower)
+        return blockchain.title() if blockchain else None
+    
+    def _has_post_mortem(self, text_lower: str) -> bool:
+        """Check if lowercased article text contains post-mortem analysis"""
+        return _POST_MORTEM_KEYWORDS.matches(text_lower)
+    
+    def _calculate_severity_score(self, amount_lost: Optional[float], risk_level: RiskLevel) -> float:
+        """Calculate severity score based on amount lost and risk level"""
+        score = _BASE_SEVERITY_SCORES.get(risk_level, 1.0)
+        
+        # Adjust based on amount lost
+        if amount_lost:
+            for threshold, bonus in _AMOUNT_SCORE_BONUSES:
+                if amount_lost >= threshold:
+                    score = min(10.0, score + bonus)
+                    break
+        
+        return score
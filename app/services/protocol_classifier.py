@@ -1,55 +1,187 @@
 import os
+import re
+import random
 import asyncio
-from typing import Optional, Dict, Any
-from openai import AsyncOpenAI
+from typing import Optional, Dict, Any, List, Tuple
+import httpx
+import orjson
+from openai import AsyncOpenAI, RateLimitError
+from app.utils.keywords import KeywordMatcher
 from app.utils.logger import logger
 
+# Substrings that make an unknown classified name look like a DeFi protocol
+_DEFI_INDICATORS = KeywordMatcher.from_keywords([
+    'swap', 'dex', 'lending', 'dao', 'yield', 'farm', 'bridge', 'vault', 'pool'
+])
+
+# Each keyword found in the text adds one to the threat score
+_THREAT_KEYWORDS = KeywordMatcher.from_keywords([
+    'hack', 'exploit', 'attack', 'breach', 'vulnerability', 'drained',
+    'stolen', 'loss', 'rug pull', 'exit scam', 'flash loan', 'oracle',
+    'smart contract', 'security', 'incident', 'compromised', 'malicious',
+    'phishing', 'private key', 'admin key', 'backdoor', 'bug', 'rekt',
+    'drain', 'manipulation', 'sandwich', 'mev', 'front-run',
+    'back-run', 'slippage', 'liquidation', 'bad debt', 'insolvency',
+    'pause', 'emergency', 'halt', 'freeze', 'blacklist', 'corrupted',
+    'unable to withdraw', 'funds trapped', 'stuck', 'locked'
+])
+
+# Known DeFi protocols for validation and keyword fallback
+_KNOWN_PROTOCOLS = frozenset({
+    'uniswap', 'compound', 'aave', 'makerdao', 'curve', 'yearn', 'synthetix',
+    'balancer', 'sushiswap', 'pancakeswap', '1inch', 'kyber', 'bancor',
+    'cream', 'alpha', 'harvest', 'pickle', 'badger', 'convex', 'frax',
+    'olympus', 'wonderland', 'tomb', 'spell', 'rari', 'fuse', 'iron',
+    'mirror', 'anchor', 'terra', 'polygon', 'arbitrum', 'optimism',
+    'avalanche', 'fantom', 'bsc', 'harmony', 'chainlink', 'dydx',
+    'gmx', 'benqi', 'trader joe', 'platypus', 'joe', 'vector',
+    'euler', 'morpho', 'radiant', 'geist', 'hundred', 'fortress',
+    'zunami', 'alexlab', 'force bridge', 'vesu', 'cork', 'marinade',
+    'cetus', 'chainge', 'lndfi', 'brincfi', 'mobiusdao', 'celsius',
+    'voyager', 'nomad', 'ronin', 'axie', 'poly network', 'thorchain',
+    'multichain', 'anyswap', 'wormhole', 'beanstalk', 'rari capital',
+    'qubit', 'nerve', 'cream finance', 'badgerdao', 'vesper', 'indexed',
+    'alpha homora', 'value defi', 'dforce', 'belt finance', 'bunny',
+    'autofarm', 'acryptos', 'viperswap', 'sphynx', 'dodo', 'mdex',
+    'mooniswap', 'deversifi', 'loopring', 'immutable x', 'hermez',
+    'polygon hermez', 'arbitrum one', 'optimism mainnet', 'metis',
+    'moonbeam', 'moonriver', 'celo', 'fuse network', 'xdai', 'gnosis'
+})
+
+# Fallback matchers; longer names are declared first so they win
+_BY_LENGTH = sorted(_KNOWN_PROTOCOLS, key=len, reverse=True)
+_PROTOCOL_WORDS = KeywordMatcher.from_keywords(_BY_LENGTH, whole_words=True)
+_PROTOCOL_SUBSTRINGS = KeywordMatcher.from_keywords(_BY_LENGTH)
+
+# Rate-limit reset headers look like "20ms", "1s" or "6m0s"
+_RESET_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_RESET_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+def _rate_limit_wait(error: RateLimitError) -> float:
+    """Seconds the API asked for in Retry-After / x-ratelimit-reset-* headers"""
+    headers = error.response.headers
+    waits = [0.0]
+    
+    try:
+        waits.append(float(headers.get('retry-after', 0)))
+    except ValueError:
+        pass  # HTTP-date form; fall back to plain backoff
+    
+    for name in ('x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens'):
+        value = headers.get(name)
+        if value:
+            waits.append(sum(float(amount) * _RESET_UNITS[unit] for amount, unit in _RESET_PART.findall(value)))
+    
+    return max(waits)
+
+def _retry_delay(attempt: int, error: Exception) -> float:
+    """Full-jitter exponential backoff, plus any wait a 429 asked for"""
+    delay = min(30, 2 ** attempt) * random.random()
+    
+    if isinstance(error, RateLimitError):
+        wait = _rate_limit_wait(error)
+        if wait:
+            logger.info(f"OpenAI rate limited; server asked to wait {wait:.2f}s")
+        delay += wait
+    
+    return delay
+
+# Static instructions live in the system message so every request shares
+# the same prefix; the user message only carries the article itself
+_CLASSIFICATION_SYSTEM_PROMPT = """You are a DeFi protocol expert. Analyze the given DeFi security incident article and identify the EXACT protocol name that was affected.
+
+Instructions:
+- Return ONLY the exact name of the DeFi protocol that was hacked/exploited
+- Look for the protocol name in the title first, then the description
+- Common protocols: Uniswap, Aave, Compound, Curve, Yearn, SushiSwap, PancakeSwap, Balancer, etc.
+- Cross-chain bridges: Multichain, Wormhole, Ronin Bridge, Poly Network, Nomad, etc.
+- If the article mentions "Chainge", return "Chainge"
+- If the article mentions "Multichain", return "Multichain"
+- Do NOT return blockchain names (Ethereum, BSC, Polygon) unless they are the protocol itself
+- Do NOT return generic terms like "DeFi", "bridge", "protocol"
+- If multiple protocols mentioned, return the PRIMARY one that was directly hacked
+- If no specific protocol is clearly identified, return "NONE"
+
+Examples:
+- "Uniswap V3 pools drained" → "Uniswap"
+- "Aave flash loan attack" → "Aave"
+- "Cross-chain bridge exploited" → "NONE" (unless specific bridge named)
+- "Chainge Finance users unable to withdraw" → "Chainge"
+"""
+
+_BATCH_CLASSIFICATION_SYSTEM_PROMPT = """You are a DeFi protocol expert. Analyze each numbered DeFi security incident article and identify the EXACT protocol name that was affected in each.
+
+Instructions:
+- For each article, give ONLY the exact name of the DeFi protocol that was hacked/exploited
+- Look for the protocol name in the title first, then the description
+- Common protocols: Uniswap, Aave, Compound, Curve, Yearn, SushiSwap, PancakeSwap, Balancer, etc.
+- Cross-chain bridges: Multichain, Wormhole, Ronin Bridge, Poly Network, Nomad, etc.
+- Do NOT return blockchain names (Ethereum, BSC, Polygon) unless they are the protocol itself
+- Do NOT return generic terms like "DeFi", "bridge", "protocol"
+- If multiple protocols are mentioned, give the PRIMARY one that was directly hacked
+- If no specific protocol is clearly identified, give "NONE"
+
+Respond with a JSON object keyed by article number, for example:
+{"1": "Uniswap", "2": "NONE", "3": "Chainge"}"""
+
+def _description_excerpt(description: str) -> str:
+    """Return the ~250 characters of description around its first threat keyword"""
+    hit = _THREAT_KEYWORDS.first_position(description.lower()) or 0
+    start = max(0, hit - 100)
+    return description[start:hit + 150]
+
 class ProtocolClassifier:
     """OpenAI-powered protocol classification service"""
     
     def __init__(self):
         self.client = None
-        self.model = "gpt-3.5-turbo"
+        # Caps in-flight API calls; created in initialize() alongside the client
+        self._sem: Optional[asyncio.Semaphore] = None
+        # Protocol extraction is a short, narrow answer; a small model suffices
+        self.model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
         self.max_retries = 3
-        
-        # List of known DeFi protocols for validation
-        self.known_protocols = {
-            'uniswap', 'compound', 'aave', 'makerdao', 'curve', 'yearn', 'synthetix',
-            'balancer', 'sushiswap', 'pancakeswap', '1inch', 'kyber', 'bancor',
-            'cream', 'alpha', 'harvest', 'pickle', 'badger', 'convex', 'frax',
-            'olympus', 'wonderland', 'tomb', 'spell', 'rari', 'fuse', 'iron',
-            'mirror', 'anchor', 'terra', 'polygon', 'arbitrum', 'optimism',
-            'avalanche', 'fantom', 'bsc', 'harmony', 'chainlink', 'dydx',
-            'gmx', 'benqi', 'trader joe', 'platypus', 'joe', 'vector',
-            'euler', 'morpho', 'radiant', 'geist', 'hundred', 'fortress',
-            'zunami', 'alexlab', 'force bridge', 'vesu', 'cork', 'marinade',
-            'cetus', 'chainge', 'lndfi', 'brincfi', 'mobiusdao', 'celsius',
-            'voyager', 'nomad', 'ronin', 'axie', 'poly network', 'thorchain',
-            'multichain', 'anyswap', 'wormhole', 'beanstalk', 'rari capital',
-            'qubit', 'nerve', 'cream finance', 'badgerdao', 'vesper', 'indexed',
-            'alpha homora', 'value defi', 'dforce', 'belt finance', 'bunny',
-            'autofarm', 'acryptos', 'viperswap', 'sphynx', 'dodo', 'mdex',
-            'mooniswap', 'deversifi', 'loopring', 'immutable x', 'hermez',
-            'polygon hermez', 'arbitrum one', 'optimism mainnet', 'metis',
-            'moonbeam', 'moonriver', 'celo', 'fuse network', 'xdai', 'gnosis'
-        }
+        # Articles packed into one chat completion by classify_protocols_batch
+        self.batch_size = 10
+        # Trust a known protocol named in the article before asking OpenAI
+        self.fallback_first = os.getenv("OPENAI_FALLBACK_FIRST", "1") == "1"
     
     async def initialize(self):
         """Initialize the OpenAI client"""
+        if self.client:
+            # Every ScraperManager initializes the shared classifier
+            return
+        
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             logger.warning("OPENAI_API_KEY not found. Protocol classification will use fallback method.")
             return
         
-        self.client = AsyncOpenAI(api_key=api_key)
+        # Keep-alive pool sized for a scrape's burst of concurrent classifications
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60),
+            timeout=httpx.Timeout(10.0, connect=5.0)
+        )
+        self.client = AsyncOpenAI(api_key=api_key, http_client=http_client)
+        self._sem = asyncio.Semaphore(int(os.getenv("OPENAI_MAX_CONCURRENCY", "32")))
         logger.info("OpenAI client initialized for protocol classification")
     
+    async def close(self):
+        """Close the OpenAI client and its connection pool"""
+        if self.client:
+            await self.client.close()
+            self.client = None
+    
     async def classify_protocol(self, title: str, description: str) -> Optional[str]:
         """Classify the DeFi protocol from article title and description"""
         if not self.client:
             logger.debug("OpenAI client not available, using fallback classification")
             return self._fallback_classification(title, description)
         
+        if self.fallback_first:
+            protocol = self._fallback_classification(title, description)
+            if protocol:
+                return protocol
+        
         try:
             # Prepare the prompt
             prompt = self._create_classification_prompt(title, description)
@@ -57,22 +189,23 @@ class ProtocolClassifier:
             # Make API call with retries
             for attempt in range(self.max_retries):
                 try:
-                    response = await self.client.chat.completions.create(
-                        model=self.model,
-                        messages=[
-                            {
-                                "role": "system",
-                                "content": "You are a DeFi protocol expert. Analyze the given text and identify the specific DeFi protocol mentioned. Return only the protocol name or 'NONE' if no specific protocol is identified."
-                            },
-                            {
-                                "role": "user",
-                                "content": prompt
-                            }
-                        ],
-                        max_tokens=50,
-                        temperature=0.1,
-                        timeout=10.0
-                    )
+                    async with self._sem:
+                        response = await self.client.chat.completions.create(
+                            model=self.model,
+                            messages=[
+                                {
+                                    "role": "system",
+                                    "content": _CLASSIFICATION_SYSTEM_PROMPT
+                                },
+                                {
+                                    "role": "user",
+                                    "content": prompt
+                                }
+                            ],
+                            max_tokens=50,
+                            temperature=0.1,
+                            timeout=10.0
+                        )
                     
                     protocol = response.choices[0].message.content.strip()
                     return self._validate_protocol(protocol)
@@ -82,42 +215,95 @@ class ProtocolClassifier:
                     if attempt == self.max_retries - 1:
                         logger.error("All OpenAI API attempts failed, using fallback")
                         return self._fallback_classification(title, description)
-                    await asyncio.sleep(1)  # Wait before retry
+                    await asyncio.sleep(_retry_delay(attempt, e))
                     
         except Exception as e:
             logger.error(f"Error in protocol classification: {str(e)}")
             return self._fallback_classification(title, description)
     
+    async def classify_protocols_batch(self, articles: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """Classify many (title, description) pairs, batch_size articles per API call"""
+        if not self.client:
+            logger.debug("OpenAI client not available, using fallback classification")
+            return [self._fallback_classification(title, description) for title, description in articles]
+        
+        if self.fallback_first:
+            protocols = [self._fallback_classification(title, description) for title, description in articles]
+        else:
+            protocols = [None] * len(articles)
+        
+        # Only articles without a keyword hit go to the API
+        pending = [i for i, protocol in enumerate(protocols) if protocol is None]
+        chunks = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        results = await asyncio.gather(*(
+            self._classify_chunk([articles[index] for index in chunk]) for chunk in chunks
+        ))
+        
+        for chunk, chunk_result in zip(chunks, results):
+            for index, protocol in zip(chunk, chunk_result):
+                protocols[index] = protocol
+        return protocols
+    
+    async def _classify_chunk(self, articles: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """Classify up to batch_size articles with a single chat completion"""
+        if len(articles) == 1:
+            return [await self.classify_protocol(*articles[0])]
+        
+        prompt = self._create_batch_classification_prompt(articles)
+        
+        for attempt in range(self.max_retries):
+            try:
+                async with self._sem:
+                    response = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {
+                                "role": "system",
+                                "content": _BATCH_CLASSIFICATION_SYSTEM_PROMPT
+                            },
+                            {
+                                "role": "user",
+                                "content": prompt
+                            }
+                        ],
+                        response_format={"type": "json_object"},
+                        max_tokens=20 * len(articles) + 20,
+                        temperature=0.1,
+                        timeout=20.0
+                    )
+                
+                answers = orjson.loads(response.choices[0].message.content)
+                if not isinstance(answers, dict):
+                    raise ValueError("Batch classification response is not a JSON object")
+                break
+                
+            except Exception as e:
+                logger.warning(f"OpenAI batch API attempt {attempt + 1} failed: {str(e)}")
+                if attempt == self.max_retries - 1:
+                    logger.error("All OpenAI batch API attempts failed, using fallback")
+                    return [self._fallback_classification(title, description) for title, description in articles]
+                await asyncio.sleep(_retry_delay(attempt, e))
+        
+        protocols = []
+        for number, (title, description) in enumerate(articles, start=1):
+            answer = answers.get(str(number))
+            if isinstance(answer, str):
+                protocols.append(self._validate_protocol(answer.strip()))
+            else:
+                # The model skipped this article; ask about it on its own
+                protocols.append(await self.classify_protocol(title, description))
+        return protocols
+    
+    def _create_batch_classification_prompt(self, articles: List[Tuple[str, str]]) -> str:
+        """Create a single prompt covering several numbered articles"""
+        return "\n\n".join(
+            f"{number}. Title: {title}\n   Description: {_description_excerpt(description)}"
+            for number, (title, description) in enumerate(articles, start=1)
+        )
+    
     def _create_classification_prompt(self, title: str, description: str) -> str:
         """Create a prompt for protocol classification"""
-        text = f"Title: {title}\n\nDescription: {description[:800]}..."
-        
-        prompt = f"""
-        Analyze this DeFi security incident article and identify the EXACT protocol name that was affected:
-
-        {text}
-
-        Instructions:
-        - Return ONLY the exact name of the DeFi protocol that was hacked/exploited
-        - Look for the protocol name in the title first, then the description
-        - Common protocols: Uniswap, Aave, Compound, Curve, Yearn, SushiSwap, PancakeSwap, Balancer, etc.
-        - Cross-chain bridges: Multichain, Wormhole, Ronin Bridge, Poly Network, Nomad, etc.
-        - If the article mentions "Chainge", return "Chainge"
-        - If the article mentions "Multichain", return "Multichain" 
-        - Do NOT return blockchain names (Ethereum, BSC, Polygon) unless they are the protocol itself
-        - Do NOT return generic terms like "DeFi", "bridge", "protocol"
-        - If multiple protocols mentioned, return the PRIMARY one that was directly hacked
-        - If no specific protocol is clearly identified, return "NONE"
-        
-        Examples:
-        - "Uniswap V3 pools drained" → "Uniswap"
-        - "Aave flash loan attack" → "Aave"
-        - "Cross-chain bridge exploited" → "NONE" (unless specific bridge named)
-        - "Chainge Finance users unable to withdraw" → "Chainge"
-
-        Protocol name:
-        """
-        return prompt
+        return f"Title: {title}\n\nDescription: {_description_excerpt(description)}\n\nProtocol name:"
     
     def _validate_protocol(self, protocol: str) -> Optional[str]:
         """Validate and clean the protocol name returned by OpenAI"""
@@ -130,11 +316,11 @@ class ProtocolClassifier:
         protocol_clean = protocol_clean.replace("defi", "").replace("network", "").strip()
         
         # Direct match in known protocols
-        if protocol_clean in self.known_protocols:
+        if protocol_clean in _KNOWN_PROTOCOLS:
             return protocol_clean.title()
         
         # Check for partial matches with known protocols
-        for known in self.known_protocols:
+        for known in _KNOWN_PROTOCOLS:
             # Exact substring match
             if protocol_clean == known or known == protocol_clean:
                 return known.title()
@@ -155,12 +341,11 @@ class ProtocolClassifier:
         }
         
         for short, full in special_cases.items():
-            if short in protocol_clean and full in self.known_protocols:
+            if short in protocol_clean and full in _KNOWN_PROTOCOLS:
                 return full.title()
         
         # If it looks like a legitimate protocol name (has DeFi-related keywords), keep it
-        defi_indicators = ['swap', 'dex', 'lending', 'dao', 'yield', 'farm', 'bridge', 'vault', 'pool']
-        if any(indicator in protocol_clean for indicator in defi_indicators):
+        if _DEFI_INDICATORS.matches(protocol_clean):
             return protocol.strip().title()
         
         # If it's a proper noun (capitalized) and not a common word, might be a protocol
@@ -176,18 +361,15 @@ class ProtocolClassifier:
         text = f"{title} {description}".lower()
         
         # Look for exact protocol mentions (prioritize longer names first)
-        for protocol in sorted(self.known_protocols, key=len, reverse=True):
-            # Check for whole word matches to avoid false positives
-            import re
-            pattern = r'\b' + re.escape(protocol) + r'\b'
-            if re.search(pattern, text):
-                return protocol.title()
+        # Whole word matches avoid false positives
+        protocol = _PROTOCOL_WORDS.first(text)
+        if protocol:
+            return protocol.title()
         
         # Check for protocol mentions in title (higher priority)
-        title_lower = title.lower()
-        for protocol in sorted(self.known_protocols, key=len, reverse=True):
-            if protocol in title_lower:
-                return protocol.title()
+        protocol = _PROTOCOL_SUBSTRINGS.first(title.lower())
+        if protocol:
+            return protocol.title()
         
         return None
     
@@ -195,9 +377,32 @@ class ProtocolClassifier:
         """
         Determine if an article is relevant threat intelligence for a specific protocol
         Returns dict with 'is_relevant', 'protocol', and 'confidence'
+        The protocol may come from keyword matching alone; OpenAI is only
+        consulted when no known protocol is named (see fallback_first)
         """
-        protocol = await self.classify_protocol(title, description)
+        # Without threat indicators no protocol can make the article relevant
+        threat_score = self._threat_score(title, description)
+        if not threat_score:
+            return self._no_threat_indicators()
         
+        protocol = await self.classify_protocol(title, description)
+        return self._assess_relevance(title, protocol, threat_score)
+    
+    def _threat_score(self, title: str, description: str) -> int:
+        """Count the distinct threat keywords in an article"""
+        return len(_THREAT_KEYWORDS.labels(f"{title} {description}".lower()))
+    
+    def _no_threat_indicators(self) -> Dict[str, Any]:
+        """Result for an article skipped before classification"""
+        return {
+            'is_relevant': False,
+            'protocol': None,
+            'confidence': 0.0,
+            'reason': 'No threat indicators'
+        }
+    
+    def _assess_relevance(self, title: str, protocol: Optional[str], threat_score: int) -> Dict[str, Any]:
+        """Score threat relevance for an article whose protocol is already classified"""
         if not protocol:
             return {
                 'is_relevant': False,
@@ -206,22 +411,6 @@ class ProtocolClassifier:
                 'reason': 'No specific protocol identified'
             }
         
-        # Check for threat intelligence keywords
-        text = f"{title} {description}".lower()
-        threat_keywords = [
-            'hack', 'exploit', 'attack', 'breach', 'vulnerability', 'drained',
-            'stolen', 'loss', 'rug pull', 'exit scam', 'flash loan', 'oracle',
-            'smart contract', 'security', 'incident', 'compromised', 'malicious',
-            'phishing', 'private key', 'admin key', 'backdoor', 'bug', 'rekt',
-            'exploit', 'drain', 'manipulation', 'sandwich', 'mev', 'front-run',
-            'back-run', 'slippage', 'liquidation', 'bad debt', 'insolvency',
-            'pause', 'emergency', 'halt', 'freeze', 'blacklist', 'corrupted',
-            'unable to withdraw', 'funds trapped', 'stuck', 'locked'
-        ]
-        
-        # Count threat keywords
-        threat_score = sum(1 for keyword in threat_keywords if keyword in text)
-        
         # Boost confidence if protocol is clearly mentioned in title
         title_mentions_protocol = protocol.lower() in title.lower()
         protocol_boost = 0.2 if title_mentions_protocol else 0.0
@@ -244,5 +433,29 @@ class ProtocolClassifier:
             'reason': f'Protocol: {protocol}, threat indicators: {threat_score}, confidence: {confidence:.2f}' if is_relevant else f'Low threat relevance (score: {threat_score}) or unclear protocol'
         }
 
+    async def is_threat_intel_relevant_batch(self, articles: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Run is_threat_intel_relevant for many (title, description) pairs at once
+        Results are returned in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(articles)
+        
+        # Only articles with threat indicators are worth classifying
+        candidates = []
+        threat_scores = []
+        for index, (title, description) in enumerate(articles):
+            threat_score = self._threat_score(title, description)
+            if threat_score:
+                candidates.append(index)
+                threat_scores.append(threat_score)
+            else:
+                results[index] = self._no_threat_indicators()
+        
+        protocols = await self.classify_protocols_batch([articles[index] for index in candidates])
+        for index, protocol, threat_score in zip(candidates, protocols, threat_scores):
+            title, _ = articles[index]
+            results[index] = self._assess_relevance(title, protocol, threat_score)
+        return results
+
 # Global instance
 protocol_classifier = ProtocolClassifier()
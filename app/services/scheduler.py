@@ -4,24 +4,20 @@ Background scheduler for automatic scraping
 
 import asyncio
 import schedule
-import time
-from threading import Thread
 from datetime import datetime, timedelta
-import os
-from dotenv import load_dotenv
-
+from typing import Optional, Set
 from app.scrapers.manager import ScraperManager
 from app.utils.logger import logger
 
-load_dotenv()
-
 class BackgroundScheduler:
     """Background scheduler for periodic scraping tasks"""
     
     def __init__(self):
         self.scraper_manager = None
         self.running = False
-        self.thread = None
+        self._loop_task: Optional[asyncio.Task] = None
+        # Strong references to in-flight job tasks so they aren't collected
+        self._job_tasks: Set[asyncio.Task] = set()
     
     async def initialize(self):
         """Initialize the scheduler"""
@@ -66,20 +62,24 @@ class BackgroundScheduler:
     def setup_schedule(self):
         """Setup the scraping schedule"""
         # Schedule scraping every 4 hours
-        schedule.every(4).hours.do(
-            lambda: asyncio.create_task(self.run_scheduled_scrape())
-        )
+        schedule.every(4).hours.do(self._spawn, self.run_scheduled_scrape)
         
         # Schedule daily cleanup (optional - could remove old data, compress logs, etc.)
-        schedule.every().day.at("02:00").do(self.daily_maintenance)
+        schedule.every().day.at("02:00").do(self._spawn, self.daily_maintenance)
         
         logger.info("Scraping schedule configured: every 4 hours + daily maintenance at 2 AM")
     
-    def daily_maintenance(self):
+    async def daily_maintenance(self):
         """Daily maintenance tasks"""
         try:
             logger.info("Running daily maintenance tasks")
             
+            # Expired article outcomes otherwise linger on disk until evicted;
+            # the SQLite deletes and unlinks run off the event loop
+            if self.scraper_manager:
+                removed = await asyncio.to_thread(self.scraper_manager.prune_caches)
+                logger.info(f"Pruned {removed} expired article cache entries")
+            
             # Could add tasks like:
             # - Clean up old log files
             # - Compress old data
@@ -91,13 +91,24 @@ class BackgroundScheduler:
         except Exception as e:
             logger.error(f"Error in daily maintenance: {str(e)}")
     
-    def run_scheduler(self):
+    def _spawn(self, job):
+        """Start a coroutine job on the event loop without waiting for it"""
+        task = asyncio.create_task(job())
+        self._job_tasks.add(task)
+        task.add_done_callback(self._job_tasks.discard)
+    
+    async def run_scheduler(self):
         """Run the scheduler in a loop"""
         logger.info("Starting background scheduler loop")
         
+        # Runs on the application's event loop, so due jobs start their
+        # coroutines directly instead of hopping over from another thread
         while self.running:
             schedule.run_pending()
-            time.sleep(60)  # Check every minute
+            
+            # Sleep until the next job is due instead of polling every minute
+            idle = schedule.idle_seconds()
+            await asyncio.sleep(60 if idle is None else max(idle, 0))
         
         logger.info("Background scheduler loop stopped")
     
@@ -108,19 +119,21 @@ class BackgroundScheduler:
             self.setup_schedule()
             
             # Run initial scraping task
-            asyncio.create_task(self.run_scheduled_scrape())
+            self._spawn(self.run_scheduled_scrape)
             
-            # Start scheduler thread
-            self.thread = Thread(target=self.run_scheduler, daemon=True)
-            self.thread.start()
+            # Start scheduler loop
+            self._loop_task = asyncio.create_task(self.run_scheduler())
             
             logger.info("Background scheduler started")
     
     def stop(self):
         """Stop the background scheduler"""
         self.running = False
-        if self.thread:
-            self.thread.join(timeout=5)
+        if self._loop_task:
+            self._loop_task.cancel()
+            self._loop_task = None
+        for task in self._job_tasks:
+            task.cancel()
         logger.info("Background scheduler stopped")
 
 # Global scheduler instance
@@ -1,10 +1,10 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, asc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, desc, asc, select
 
 from app.database.database import ThreatIntelDB
-from app.models.threat_intel import ThreatIntelItem, RiskLevel
+from app.models.threat_intel import ThreatIntelItem
 from app.utils.logger import logger
 
 class ThreatAnalyzer:
@@ -20,7 +20,7 @@ class ThreatAnalyzer:
     
     async def get_threat_intel(
         self,
-        db: Session,
+        db: AsyncSession,
         protocol: Optional[str] = None,
         risk_level: Optional[str] = None,
         limit: int = 50,
@@ -32,30 +32,27 @@ class ThreatAnalyzer:
         attack_type: Optional[str] = None,
         tags: Optional[List[str]] = None,
         verified_only: bool = False
-    ) -> List[ThreatIntelItem]:
+    ) -> Tuple[List[ThreatIntelItem], int]:
         """
         Get threat intelligence data with various filters
+        Returns the requested page of items and the total number of matches
         """
         try:
-            query = db.query(ThreatIntelDB)
+            # Collect filters and apply them in one where() call
+            conditions = []
             
-            # Apply filters
             if protocol:
-                query = query.filter(
-                    ThreatIntelDB.protocol_name.ilike(f"%{protocol}%")
-                )
+                conditions.append(ThreatIntelDB.protocol_name.ilike(f"%{protocol}%"))
             
             if risk_level:
-                query = query.filter(ThreatIntelDB.risk_level == risk_level.lower())
+                conditions.append(ThreatIntelDB.risk_level == risk_level.lower())
             
             if source:
-                query = query.filter(
-                    ThreatIntelDB.source_name.ilike(f"%{source}%")
-                )
+                conditions.append(ThreatIntelDB.source_name.ilike(f"%{source}%"))
             
             if days_back:
                 cutoff_date = datetime.utcnow() - timedelta(days=days_back)
-                query = query.filter(
+                conditions.append(
                     or_(
                         ThreatIntelDB.published_date >= cutoff_date,
                         ThreatIntelDB.scraped_date >= cutoff_date
@@ -63,99 +60,107 @@ class ThreatAnalyzer:
                 )
             
             if min_amount:
-                query = query.filter(ThreatIntelDB.amount_lost >= min_amount)
+                conditions.append(ThreatIntelDB.amount_lost >= min_amount)
             
             if blockchain:
-                query = query.filter(
-                    ThreatIntelDB.blockchain.ilike(f"%{blockchain}%")
-                )
+                conditions.append(ThreatIntelDB.blockchain.ilike(f"%{blockchain}%"))
             
             if attack_type:
-                query = query.filter(
-                    ThreatIntelDB.attack_type.ilike(f"%{attack_type}%")
-                )
+                conditions.append(ThreatIntelDB.attack_type.ilike(f"%{attack_type}%"))
             
             if verified_only:
-                query = query.filter(ThreatIntelDB.is_verified == True)
+                conditions.append(ThreatIntelDB.is_verified == True)
             
             if tags:
                 # Filter by tags (JSON contains any of the specified tags)
-                tag_conditions = []
-                for tag in tags:
-                    tag_conditions.append(
-                        ThreatIntelDB.tags.contains([tag])
-                    )
-                if tag_conditions:
-                    query = query.filter(or_(*tag_conditions))
+                conditions.append(or_(*(ThreatIntelDB.tags.contains([tag]) for tag in tags)))
+            
+            query = select(ThreatIntelDB).where(*conditions)
             
-            # Order by severity score and recency
-            query = query.order_by(
+            # Total match count rides along on every row via COUNT(*) OVER ()
+            page_query = query.add_columns(
+                func.count().over().label('total_count')
+            ).order_by(
                 desc(ThreatIntelDB.severity_score),
                 desc(ThreatIntelDB.published_date),
                 desc(ThreatIntelDB.scraped_date)
             )
             
             # Apply pagination
-            results = query.offset(offset).limit(limit).all()
+            rows = (await db.execute(page_query.offset(offset).limit(limit))).all()
+            results = [row[0] for row in rows]
+            
+            if rows:
+                total_count = rows[0].total_count
+            elif offset:
+                # Paged past the end; only now pay for a separate count
+                total_count = await db.scalar(select(func.count()).select_from(query.subquery()))
+            else:
+                total_count = 0
             
             # Convert to Pydantic models
-            threat_items = []
-            for result in results:
-                threat_item = ThreatIntelItem(
-                    id=result.id,
-                    title=result.title,
-                    description=result.description,
-                    protocol_name=result.protocol_name,
-                    risk_level=RiskLevel(result.risk_level),
-                    source_url=result.source_url,
-                    source_name=result.source_name,
-                    published_date=result.published_date,
-                    scraped_date=result.scraped_date,
-                    tags=result.tags or [],
-                    amount_lost=result.amount_lost,
-                    attack_type=result.attack_type,
-                    blockchain=result.blockchain,
-                    severity_score=result.severity_score,
-                    is_verified=result.is_verified,
-                    additional_data=result.additional_data or {}
-                )
-                threat_items.append(threat_item)
+            threat_items = [self._to_item(result) for result in results]
             
-            logger.info(f"Retrieved {len(threat_items)} threat intelligence items")
-            return threat_items
+            logger.info(f"Retrieved {len(threat_items)} of {total_count} threat intelligence items")
+            return threat_items, total_count
             
         except Exception as e:
             logger.error(f"Error retrieving threat intelligence: {str(e)}")
             raise
     
-    async def get_protocols_list(self, db: Session) -> List[Dict[str, Any]]:
+    def _to_item(self, result: ThreatIntelDB) -> ThreatIntelItem:
+        """Wrap a stored row without re-running validation on data that passed it on insert"""
+        return ThreatIntelItem.model_construct(
+            id=result.id,
+            title=result.title,
+            description=result.description,
+            protocol_name=result.protocol_name,
+            risk_level=result.risk_level,
+            source_url=result.source_url,
+            source_name=result.source_name,
+            published_date=result.published_date,
+            scraped_date=result.scraped_date,
+            tags=result.tags or [],
+            amount_lost=result.amount_lost,
+            attack_type=result.attack_type,
+            blockchain=result.blockchain,
+            severity_score=result.severity_score,
+            is_verified=result.is_verified,
+            additional_data=result.additional_data or {}
+        )
+    
+    def _protocol_stats_query(self):
+        """Per-protocol aggregate query shared by the protocol list and summary"""
+        return select(
+            ThreatIntelDB.protocol_name,
+            func.count(ThreatIntelDB.id).label('incident_count'),
+            func.sum(ThreatIntelDB.amount_lost).label('total_lost'),
+            func.max(ThreatIntelDB.severity_score).label('max_severity'),
+            func.max(ThreatIntelDB.published_date).label('latest_incident')
+        ).filter(
+            ThreatIntelDB.protocol_name.isnot(None)
+        ).group_by(
+            ThreatIntelDB.protocol_name
+        ).order_by(
+            desc('total_lost'),
+            desc('incident_count')
+        )
+    
+    def _protocol_stats_to_dict(self, result) -> Dict[str, Any]:
+        return {
+            "name": result.protocol_name,
+            "incident_count": result.incident_count,
+            "total_amount_lost": result.total_lost or 0,
+            "max_severity_score": result.max_severity,
+            "latest_incident_date": result.latest_incident
+        }
+    
+    async def get_protocols_list(self, db: AsyncSession) -> List[Dict[str, Any]]:
         """Get list of all DeFi protocols with threat intelligence data"""
         try:
-            results = db.query(
-                ThreatIntelDB.protocol_name,
-                func.count(ThreatIntelDB.id).label('incident_count'),
-                func.sum(ThreatIntelDB.amount_lost).label('total_lost'),
-                func.max(ThreatIntelDB.severity_score).label('max_severity'),
-                func.max(ThreatIntelDB.published_date).label('latest_incident')
-            ).filter(
-                ThreatIntelDB.protocol_name.isnot(None)
-            ).group_by(
-                ThreatIntelDB.protocol_name
-            ).order_by(
-                desc('total_lost'),
-                desc('incident_count')
-            ).all()
-            
-            protocols = []
-            for result in results:
-                protocol_data = {
-                    "name": result.protocol_name,
-                    "incident_count": result.incident_count,
-                    "total_amount_lost": result.total_lost or 0,
-                    "max_severity_score": result.max_severity,
-                    "latest_incident_date": result.latest_incident
-                }
-                protocols.append(protocol_data)
+            results = (await db.execute(self._protocol_stats_query())).all()
+            
+            protocols = [self._protocol_stats_to_dict(result) for result in results]
             
             logger.info(f"Retrieved {len(protocols)} protocols")
             return protocols
@@ -164,66 +169,84 @@ class ThreatAnalyzer:
             logger.error(f"Error retrieving protocols list: {str(e)}")
             raise
     
-    async def get_statistics(self, db: Session) -> Dict[str, Any]:
-        """Get general statistics about the threat intelligence data"""
+    async def get_protocol_summary(self, db: AsyncSession, protocol_name: str) -> Optional[Dict[str, Any]]:
+        """Get aggregate statistics for a single protocol (case-insensitive name match)"""
         try:
-            # Basic counts
-            total_incidents = db.query(func.count(ThreatIntelDB.id)).scalar()
-            
-            verified_incidents = db.query(func.count(ThreatIntelDB.id)).filter(
-                ThreatIntelDB.is_verified == True
-            ).scalar()
+            result = (await db.execute(
+                self._protocol_stats_query().filter(
+                    func.lower(ThreatIntelDB.protocol_name) == protocol_name.lower()
+                ).limit(1)
+            )).first()
             
-            # Amount statistics
-            total_amount_lost = db.query(func.sum(ThreatIntelDB.amount_lost)).scalar() or 0
+            return self._protocol_stats_to_dict(result) if result else None
             
-            avg_amount_lost = db.query(func.avg(ThreatIntelDB.amount_lost)).filter(
-                ThreatIntelDB.amount_lost.isnot(None)
-            ).scalar() or 0
-            
-            # Risk level distribution
-            risk_distribution = db.query(
+        except Exception as e:
+            logger.error(f"Error retrieving protocol summary: {str(e)}")
+            raise
+    
+    def data_freshness_hours(self, latest_update: Optional[datetime]) -> Optional[float]:
+        """Hours since the most recent scrape, or None for an empty table"""
+        if not latest_update:
+            return None
+        return (datetime.utcnow() - latest_update).total_seconds() / 3600
+    
+    async def get_statistics(self, db: AsyncSession) -> Dict[str, Any]:
+        """Get general statistics about the threat intelligence data"""
+        try:
+            # Scalar aggregates share one scan, split with FILTER clauses
+            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+            totals = (await db.execute(select(
+                func.count(ThreatIntelDB.id).label('total'),
+                func.count(ThreatIntelDB.id).filter(ThreatIntelDB.is_verified == True).label('verified'),
+                func.sum(ThreatIntelDB.amount_lost).label('total_lost'),
+                func.avg(ThreatIntelDB.amount_lost).label('avg_lost'),
+                func.count(ThreatIntelDB.id).filter(
+                    or_(
+                        ThreatIntelDB.published_date >= thirty_days_ago,
+                        ThreatIntelDB.scraped_date >= thirty_days_ago
+                    )
+                ).label('recent'),
+                func.max(ThreatIntelDB.scraped_date).label('latest_update')
+            ))).one()
+            
+            total_incidents = totals.total
+            verified_incidents = totals.verified
+            total_amount_lost = totals.total_lost or 0
+            avg_amount_lost = totals.avg_lost or 0
+            recent_incidents = totals.recent
+            latest_update = totals.latest_update
+            
+            # Risk level and source distributions from one grouped query
+            risk_dist_dict: Dict[str, int] = {}
+            source_dist_dict: Dict[str, int] = {}
+            distribution = (await db.execute(select(
                 ThreatIntelDB.risk_level,
-                func.count(ThreatIntelDB.id).label('count')
-            ).group_by(ThreatIntelDB.risk_level).all()
-            
-            risk_dist_dict = {level: count for level, count in risk_distribution}
-            
-            # Source distribution
-            source_distribution = db.query(
                 ThreatIntelDB.source_name,
                 func.count(ThreatIntelDB.id).label('count')
-            ).group_by(ThreatIntelDB.source_name).all()
-            
-            source_dist_dict = {source: count for source, count in source_distribution}
+            ).group_by(ThreatIntelDB.risk_level, ThreatIntelDB.source_name))).all()
             
-            # Recent activity (last 30 days)
-            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            recent_incidents = db.query(func.count(ThreatIntelDB.id)).filter(
-                or_(
-                    ThreatIntelDB.published_date >= thirty_days_ago,
-                    ThreatIntelDB.scraped_date >= thirty_days_ago
-                )
-            ).scalar()
+            for level, source, count in distribution:
+                risk_dist_dict[level] = risk_dist_dict.get(level, 0) + count
+                source_dist_dict[source] = source_dist_dict.get(source, 0) + count
             
             # Top attack types
-            attack_types = db.query(
+            attack_types = (await db.execute(select(
                 ThreatIntelDB.attack_type,
                 func.count(ThreatIntelDB.id).label('count')
             ).filter(
                 ThreatIntelDB.attack_type.isnot(None)
-            ).group_by(ThreatIntelDB.attack_type).order_by(desc('count')).limit(10).all()
+            ).group_by(ThreatIntelDB.attack_type).order_by(desc('count')).limit(10))).all()
             
             attack_types_dict = {attack_type: count for attack_type, count in attack_types}
             
             # Top blockchains
-            blockchains = db.query(
+            blockchains = (await db.execute(select(
                 ThreatIntelDB.blockchain,
                 func.count(ThreatIntelDB.id).label('count'),
                 func.sum(ThreatIntelDB.amount_lost).label('total_lost')
             ).filter(
                 ThreatIntelDB.blockchain.isnot(None)
-            ).group_by(ThreatIntelDB.blockchain).order_by(desc('total_lost')).limit(10).all()
+            ).group_by(ThreatIntelDB.blockchain).order_by(desc('total_lost')).limit(10))).all()
             
             blockchain_stats = []
             for blockchain, count, total_lost in blockchains:
@@ -233,9 +256,6 @@ class ThreatAnalyzer:
                     "total_amount_lost": total_lost or 0
                 })
             
-            # Latest update
-            latest_update = db.query(func.max(ThreatIntelDB.scraped_date)).scalar()
-            
             statistics = {
                 "total_incidents": total_incidents,
                 "verified_incidents": verified_incidents,
@@ -248,7 +268,7 @@ class ThreatAnalyzer:
                 "top_attack_types": attack_types_dict,
                 "blockchain_statistics": blockchain_stats,
                 "latest_update": latest_update,
-                "data_freshness_hours": (datetime.utcnow() - latest_update).total_seconds() / 3600 if latest_update else None
+                "data_freshness_hours": self.data_freshness_hours(latest_update)
             }
             
             logger.info("Retrieved threat intelligence statistics")
@@ -258,12 +278,12 @@ class ThreatAnalyzer:
             logger.error(f"Error retrieving statistics: {str(e)}")
             raise
     
-    async def get_trending_threats(self, db: Session, days: int = 7, limit: int = 10) -> List[ThreatIntelItem]:
+    async def get_trending_threats(self, db: AsyncSession, days: int = 7, limit: int = 10) -> List[ThreatIntelItem]:
         """Get trending threats based on recent activity and severity"""
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=days)
             
-            query = db.query(ThreatIntelDB).filter(
+            query = select(ThreatIntelDB).filter(
                 or_(
                     ThreatIntelDB.published_date >= cutoff_date,
                     ThreatIntelDB.scraped_date >= cutoff_date
@@ -274,29 +294,9 @@ class ThreatAnalyzer:
                 desc(ThreatIntelDB.published_date)
             ).limit(limit)
             
-            results = query.all()
-            
-            threat_items = []
-            for result in results:
-                threat_item = ThreatIntelItem(
-                    id=result.id,
-                    title=result.title,
-                    description=result.description,
-                    protocol_name=result.protocol_name,
-                    risk_level=RiskLevel(result.risk_level),
-                    source_url=result.source_url,
-                    source_name=result.source_name,
-                    published_date=result.published_date,
-                    scraped_date=result.scraped_date,
-                    tags=result.tags or [],
-                    amount_lost=result.amount_lost,
-                    attack_type=result.attack_type,
-                    blockchain=result.blockchain,
-                    severity_score=result.severity_score,
-                    is_verified=result.is_verified,
-                    additional_data=result.additional_data or {}
-                )
-                threat_items.append(threat_item)
+            results = (await db.execute(query)).scalars().all()
+            
+            threat_items = [self._to_item(result) for result in results]
             
             logger.info(f"Retrieved {len(threat_items)} trending threats")
             return threat_items
@@ -305,10 +305,10 @@ class ThreatAnalyzer:
             logger.error(f"Error retrieving trending threats: {str(e)}")
             raise
     
-    async def search_threats(self, db: Session, query_text: str, limit: int = 20) -> List[ThreatIntelItem]:
+    async def search_threats(self, db: AsyncSession, query_text: str, limit: int = 20) -> List[ThreatIntelItem]:
         """Search threats by text query"""
         try:
-            search_query = db.query(ThreatIntelDB).filter(
+            search_query = select(ThreatIntelDB).filter(
                 or_(
                     ThreatIntelDB.title.ilike(f"%{query_text}%"),
                     ThreatIntelDB.description.ilike(f"%{query_text}%"),
@@ -321,29 +321,9 @@ class ThreatAnalyzer:
                 desc(ThreatIntelDB.published_date)
             ).limit(limit)
             
-            results = search_query.all()
-            
-            threat_items = []
-            for result in results:
-                threat_item = ThreatIntelItem(
-                    id=result.id,
-                    title=result.title,
-                    description=result.description,
-                    protocol_name=result.protocol_name,
-                    risk_level=RiskLevel(result.risk_level),
-                    source_url=result.source_url,
-                    source_name=result.source_name,
-                    published_date=result.published_date,
-                    scraped_date=result.scraped_date,
-                    tags=result.tags or [],
-                    amount_lost=result.amount_lost,
-                    attack_type=result.attack_type,
-                    blockchain=result.blockchain,
-                    severity_score=result.severity_score,
-                    is_verified=result.is_verified,
-                    additional_data=result.additional_data or {}
-                )
-                threat_items.append(threat_item)
+            results = (await db.execute(search_query)).scalars().all()
+            
+            threat_items = [self._to_item(result) for result in results]
             
             logger.info(f"Search for '{query_text}' returned {len(threat_items)} results")
             return threat_items
@@ -0,0 +1,66 @@
+"""
+Small in-process caches for the DeFi Guard OSINT API
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.config import get_settings
+
+_MISSING = object()
+
+class TTLCache:
+    """Bounded mapping whose entries expire ``ttl`` seconds after being set"""
+
+    def __init__(self, maxsize: int = 128, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Return the cached value for key, or default if missing/expired"""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store value under key, evicting the least recently used entry if full"""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached entries"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+# Aggregate query results (attack types, blockchain stats, ...), keyed by the
+# data-version ETag they were computed under so a new version never serves an
+# old body. Data only changes when the scrapers write, so entries live for one
+# scraping interval and are cleared explicitly after every successful save.
+aggregate_cache = TTLCache(
+    maxsize=8,
+    ttl=get_settings().scraping_interval_hours * 3600
+)
+
+# Data-version ETag for the read-only endpoints; a short TTL bounds how long
+# writes made outside this process (e.g. scripts/init_db.py) go unnoticed,
+# both in ETags and in the aggregate_cache entries keyed by them.
+etag_cache = TTLCache(maxsize=1, ttl=60)
+
+def invalidate_data_caches():
+    """Clear every cache derived from the threat_intel table"""
+    aggregate_cache.clear()
+    etag_cache.clear()
@@ -8,8 +8,120 @@ from datetime import datetime
 from urllib.parse import urlparse
 
 from app.models.threat_intel import RiskLevel
+from app.utils.keywords import KeywordMatcher
 from app.utils.logger import logger
 
+_HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+_URL_PATTERN = re.compile(r'https?://\S+')
+_TAG_INVALID_CHARS = re.compile(r'[^a-z0-9_]')
+
+# Common protocol name mappings
+_PROTOCOL_MAPPINGS = {
+    'uni': 'Uniswap',
+    'uniswap v2': 'Uniswap',
+    'uniswap v3': 'Uniswap',
+    'sushi': 'SushiSwap',
+    'pancake': 'PancakeSwap',
+    'compound': 'Compound',
+    'aave': 'Aave',
+    'maker': 'MakerDAO',
+    'makerdao': 'MakerDAO',
+    'yearn': 'Yearn Finance',
+    'curve': 'Curve Finance',
+    'balancer': 'Balancer',
+    '1inch': '1inch',
+    'kyber': 'Kyber Network',
+    'bancor': 'Bancor',
+    'cream': 'Cream Finance',
+    'alpha': 'Alpha Finance',
+    'harvest': 'Harvest Finance',
+    'pickle': 'Pickle Finance',
+    'badger': 'Badger DAO',
+    'convex': 'Convex Finance',
+    'frax': 'Frax Finance',
+    'olympus': 'Olympus DAO',
+    'wonderland': 'Wonderland',
+    'tomb': 'Tomb Finance',
+    'spell': 'Spell Token',
+    'rari': 'Rari Capital',
+    'fuse': 'Fuse',
+    'iron': 'Iron Finance',
+    'mirror': 'Mirror Protocol',
+    'anchor': 'Anchor Protocol',
+    'terra': 'Terra',
+    'polygon': 'Polygon',
+    'arbitrum': 'Arbitrum',
+    'optimism': 'Optimism'
+}
+
+_RISK_MAPPINGS = {
+    'low': RiskLevel.LOW,
+    'medium': RiskLevel.MEDIUM,
+    'med': RiskLevel.MEDIUM,
+    'moderate': RiskLevel.MEDIUM,
+    'high': RiskLevel.HIGH,
+    'critical': RiskLevel.CRITICAL,
+    'severe': RiskLevel.CRITICAL,
+    'urgent': RiskLevel.CRITICAL
+}
+
+_BLOCKCHAIN_MAPPINGS = {
+    'eth': 'Ethereum',
+    'ethereum': 'Ethereum',
+    'btc': 'Bitcoin',
+    'bitcoin': 'Bitcoin',
+    'bnb': 'Binance Smart Chain',
+    'bsc': 'Binance Smart Chain',
+    'binance smart chain': 'Binance Smart Chain',
+    'polygon': 'Polygon',
+    'matic': 'Polygon',
+    'avax': 'Avalanche',
+    'avalanche': 'Avalanche',
+    'ftm': 'Fantom',
+    'fantom': 'Fantom',
+    'arbitrum': 'Arbitrum',
+    'optimism': 'Optimism',
+    'sol': 'Solana',
+    'solana': 'Solana',
+    'ada': 'Cardano',
+    'cardano': 'Cardano',
+    'dot': 'Polkadot',
+    'polkadot': 'Polkadot',
+    'atom': 'Cosmos',
+    'cosmos': 'Cosmos',
+    'luna': 'Terra',
+    'terra': 'Terra',
+    'near': 'Near',
+    'algo': 'Algorand',
+    'algorand': 'Algorand',
+    'xtz': 'Tezos',
+    'tezos': 'Tezos',
+    'harmony': 'Harmony',
+    'one': 'Harmony'
+}
+
+# Severity categories, reported in declaration order
+_SEVERITY_KEYWORDS = KeywordMatcher([
+    ('critical', ['critical', 'emergency', 'immediate', 'urgent']),
+    ('high', ['major', 'significant', 'substantial', 'severe']),
+    ('exploit', ['exploit', 'attack', 'hack', 'breach']),
+    ('financial', ['million', 'billion', 'lost', 'stolen', 'drained']),
+    ('technical', ['vulnerability', 'bug', 'flaw', 'code'])
+])
+
+# Content details that raise an item's confidence score
+_AMOUNT_KEYWORDS = KeywordMatcher.from_keywords(['$', 'million', 'billion'])
+_ATTACK_KEYWORDS = KeywordMatcher.from_keywords(['exploit', 'vulnerability', 'attack'])
+
+# Base score by source reliability
+_SOURCE_SCORES = {
+    'Rekt News': 9.0,
+    'Chainalysis': 9.5,
+    'CoinDesk': 8.0,
+    'The Block': 8.0,
+    'Unknown': 5.0
+}
+
 class DataValidator:
     """Validates and cleans threat intelligence data"""
     
@@ -53,10 +165,10 @@ class DataValidator:
         description = ' '.join(description.split())
         
         # Remove HTML tags if any
-        description = re.sub(r'<[^>]+>', '', description)
+        description = _HTML_TAG_PATTERN.sub('', description)
         
         # Remove URLs from description to avoid duplication
-        description = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', description)
+        description = _URL_PATTERN.sub('', description)
         
         # Limit length
         if len(description) > 2000:
@@ -70,50 +182,11 @@ class DataValidator:
         if not protocol_name:
             return None
         
-        # Common protocol name mappings
-        protocol_mappings = {
-            'uni': 'Uniswap',
-            'uniswap v2': 'Uniswap',
-            'uniswap v3': 'Uniswap',
-            'sushi': 'SushiSwap',
-            'pancake': 'PancakeSwap',
-            'compound': 'Compound',
-            'aave': 'Aave',
-            'maker': 'MakerDAO',
-            'makerdao': 'MakerDAO',
-            'yearn': 'Yearn Finance',
-            'curve': 'Curve Finance',
-            'balancer': 'Balancer',
-            '1inch': '1inch',
-            'kyber': 'Kyber Network',
-            'bancor': 'Bancor',
-            'cream': 'Cream Finance',
-            'alpha': 'Alpha Finance',
-            'harvest': 'Harvest Finance',
-            'pickle': 'Pickle Finance',
-            'badger': 'Badger DAO',
-            'convex': 'Convex Finance',
-            'frax': 'Frax Finance',
-            'olympus': 'Olympus DAO',
-            'wonderland': 'Wonderland',
-            'tomb': 'Tomb Finance',
-            'spell': 'Spell Token',
-            'rari': 'Rari Capital',
-            'fuse': 'Fuse',
-            'iron': 'Iron Finance',
-            'mirror': 'Mirror Protocol',
-            'anchor': 'Anchor Protocol',
-            'terra': 'Terra',
-            'polygon': 'Polygon',
-            'arbitrum': 'Arbitrum',
-            'optimism': 'Optimism'
-        }
-        
         protocol_lower = protocol_name.lower().strip()
         
         # Check for exact mappings
-        if protocol_lower in protocol_mappings:
-            return protocol_mappings[protocol_lower]
+        if protocol_lower in _PROTOCOL_MAPPINGS:
+            return _PROTOCOL_MAPPINGS[protocol_lower]
         
         # Capitalize first letter of each word
         return ' '.join(word.capitalize() for word in protocol_lower.split())
@@ -143,18 +216,7 @@ class DataValidator:
         
         risk_lower = risk_level.lower().strip()
         
-        risk_mappings = {
-            'low': RiskLevel.LOW,
-            'medium': RiskLevel.MEDIUM,
-            'med': RiskLevel.MEDIUM,
-            'moderate': RiskLevel.MEDIUM,
-            'high': RiskLevel.HIGH,
-            'critical': RiskLevel.CRITICAL,
-            'severe': RiskLevel.CRITICAL,
-            'urgent': RiskLevel.CRITICAL
-        }
-        
-        return risk_mappings.get(risk_lower, RiskLevel.LOW)
+        return _RISK_MAPPINGS.get(risk_lower, RiskLevel.LOW)
     
     @staticmethod
     def clean_tags(tags: List[str]) -> List[str]:
@@ -169,7 +231,7 @@ class DataValidator:
                 clean_tag = tag.lower().strip().replace(' ', '_')
                 
                 # Remove special characters except underscore
-                clean_tag = re.sub(r'[^a-z0-9_]', '', clean_tag)
+                clean_tag = _TAG_INVALID_CHARS.sub('', clean_tag)
                 
                 if clean_tag and len(clean_tag) > 1:
                     cleaned_tags.append(clean_tag)
@@ -183,65 +245,13 @@ class DataValidator:
         if not blockchain:
             return None
         
-        blockchain_mappings = {
-            'eth': 'Ethereum',
-            'ethereum': 'Ethereum',
-            'btc': 'Bitcoin',
-            'bitcoin': 'Bitcoin',
-            'bnb': 'Binance Smart Chain',
-            'bsc': 'Binance Smart Chain',
-            'binance smart chain': 'Binance Smart Chain',
-            'polygon': 'Polygon',
-            'matic': 'Polygon',
-            'avax': 'Avalanche',
-            'avalanche': 'Avalanche',
-            'ftm': 'Fantom',
-            'fantom': 'Fantom',
-            'arbitrum': 'Arbitrum',
-            'optimism': 'Optimism',
-            'sol': 'Solana',
-            'solana': 'Solana',
-            'ada': 'Cardano',
-            'cardano': 'Cardano',
-            'dot': 'Polkadot',
-            'polkadot': 'Polkadot',
-            'atom': 'Cosmos',
-            'cosmos': 'Cosmos',
-            'luna': 'Terra',
-            'terra': 'Terra',
-            'near': 'Near',
-            'algo': 'Algorand',
-            'algorand': 'Algorand',
-            'xtz': 'Tezos',
-            'tezos': 'Tezos',
-            'harmony': 'Harmony',
-            'one': 'Harmony'
-        }
-        
         blockchain_lower = blockchain.lower().strip()
-        return blockchain_mappings.get(blockchain_lower, blockchain.title())
+        return _BLOCKCHAIN_MAPPINGS.get(blockchain_lower, blockchain.title())
     
     @staticmethod
     def extract_severity_keywords(text: str) -> List[str]:
         """Extract severity-related keywords from text"""
-        text_lower = text.lower()
-        
-        severity_keywords = {
-            'critical': ['critical', 'emergency', 'immediate', 'urgent'],
-            'high': ['major', 'significant', 'substantial', 'severe'],
-            'exploit': ['exploit', 'attack', 'hack', 'breach'],
-            'financial': ['million', 'billion', 'lost', 'stolen', 'drained'],
-            'technical': ['vulnerability', 'bug', 'flaw', 'code']
-        }
-        
-        found_keywords = []
-        for category, keywords in severity_keywords.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    found_keywords.append(category)
-                    break
-        
-        return found_keywords
+        return _SEVERITY_KEYWORDS.ordered_labels(text.lower())
     
     @staticmethod
     def calculate_confidence_score(title: str, description: str, source_name: str) -> float:
@@ -249,14 +259,7 @@ class DataValidator:
         score = 0.0
         
         # Base score by source reliability
-        source_scores = {
-            'Rekt News': 9.0,
-            'Chainalysis': 9.5,
-            'CoinDesk': 8.0,
-            'The Block': 8.0,
-            'Unknown': 5.0
-        }
-        score += source_scores.get(source_name, 5.0)
+        score += _SOURCE_SCORES.get(source_name, 5.0)
         
         # Add points for detailed content
         if len(description) > 500:
@@ -265,10 +268,11 @@ class DataValidator:
             score += 0.5
         
         # Add points for specific details
-        if any(keyword in description.lower() for keyword in ['$', 'million', 'billion']):
+        description_lower = description.lower()
+        if _AMOUNT_KEYWORDS.matches(description_lower):
             score += 0.5
         
-        if any(keyword in description.lower() for keyword in ['exploit', 'vulnerability', 'attack']):
+        if _ATTACK_KEYWORDS.matches(description_lower):
             score += 0.5
         
         # Normalize to 0-10 scale
@@ -4,11 +4,15 @@ Health monitoring and metrics for the DeFi Guard OSINT API
 
 import time
 import os
-import shutil
+import threading
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Deque, Dict, Any, Optional
 from dataclasses import dataclass, asdict
 
+import orjson
+
+from app.utils.cache import TTLCache
 from app.utils.logger import logger
 
 @dataclass
@@ -32,7 +36,7 @@ class APIMetrics:
     failed_requests: int
     average_response_time: float
     requests_per_minute: float
-    last_request_time: Optional[datetime]
+    last_request_time: Optional[int]  # time.time_ns(); datetime once serialized
     error_rate: float
 
 @dataclass
@@ -43,10 +47,33 @@ class ScrapingMetrics:
     failed_scrapes: int
     total_items_scraped: int
     total_items_saved: int
-    last_scrape_time: Optional[datetime]
+    last_scrape_time: Optional[int]  # time.time_ns(); datetime once serialized
     average_scrape_duration: float
     sources_status: Dict[str, str]
 
+# (SystemMetrics field, limit, issue reported when the field exceeds it)
+_SYSTEM_THRESHOLDS = (
+    ("cpu_percent", 80, "High CPU usage"),
+    ("memory_percent", 85, "High memory usage"),
+    ("disk_percent", 90, "Low disk space"),
+)
+
+_EPOCH = datetime(1970, 1, 1)
+
+def _ns_to_datetime(timestamp_ns: Optional[int]) -> Optional[datetime]:
+    """Convert a time.time_ns() reading to the naive UTC datetime utcnow() gives"""
+    if timestamp_ns is None:
+        return None
+    return _EPOCH + timedelta(microseconds=timestamp_ns // 1000)
+
+def _meminfo_kb(meminfo: bytes, field: bytes) -> Optional[int]:
+    """Return a /proc/meminfo field's value in kB, or None if it is absent"""
+    start = meminfo.find(field)
+    if start < 0:
+        return None
+    end = meminfo.find(b'\n', start)
+    return int(meminfo[start + len(field):end if end >= 0 else None].split()[0])
+
 class HealthMonitor:
     """Monitor system and application health"""
     
@@ -71,37 +98,70 @@ class HealthMonitor:
             average_scrape_duration=0.0,
             sources_status={}
         )
-        self.request_times = []
-        self.scrape_durations = []
+        # Bounded windows; appending past maxlen drops the oldest entry
+        self.request_times: Deque[float] = deque(maxlen=1000)
+        self.scrape_durations: Deque[float] = deque(maxlen=100)
+        # Running totals of the windows, so averages don't re-sum them
+        self._request_time_sum = 0.0
+        self._scrape_duration_sum = 0.0
+        # Monotonic arrival times of the requests seen in the last minute
+        self._request_timestamps: Deque[float] = deque()
+        # Health endpoints polled together share one procfs/statfs read
+        self._system_metrics_cache = TTLCache(maxsize=1, ttl=1.0)
+        # Memory figures come from procfs, so they are only read on Linux
+        self._has_meminfo = os.access('/proc/meminfo', os.R_OK)
+        # Serialized metrics, rebuilt only after a record_* call changes them
+        self._api_dict: Optional[Dict[str, Any]] = None
+        self._scraping_dict: Optional[Dict[str, Any]] = None
+        # record_* may be called from threadpool workers; each metric group
+        # has its own lock so API and scraping updates don't contend
+        self._api_lock = threading.Lock()
+        self._scrape_lock = threading.Lock()
+        # (whole minutes of uptime, formatted string) from the last report
+        self._uptime_cache = (-1, "")
     
     def get_system_metrics(self) -> SystemMetrics:
-        """Get current system metrics (simplified without psutil)"""
+        """Get current system metrics, re-read at most once per second"""
+        metrics = self._system_metrics_cache.get("system")
+        if metrics is None:
+            metrics = self._read_system_metrics()
+            self._system_metrics_cache.set("system", metrics)
+        return metrics
+    
+    def _read_system_metrics(self) -> SystemMetrics:
+        """Read system metrics (simplified without psutil)"""
         try:
             # Basic disk usage
-            total, used, free = shutil.disk_usage('/')
+            # Same figures as shutil.disk_usage, read straight from statvfs
+            stat = os.statvfs('/')
+            total = stat.f_blocks * stat.f_frsize
+            used = (stat.f_blocks - stat.f_bfree) * stat.f_frsize
             disk_percent = (used / total) * 100
             disk_used_gb = used / (1024 * 1024 * 1024)
             disk_total_gb = total / (1024 * 1024 * 1024)
             
-            # Try to get memory info from /proc/meminfo (Linux only)
+            # Memory info from /proc/meminfo (Linux only)
             memory_percent = 0.0
             memory_used_mb = 0.0
             memory_total_mb = 0.0
             
-            try:
-                with open('/proc/meminfo', 'r') as f:
-                    meminfo = f.read()
-                    for line in meminfo.split('\n'):
-                        if 'MemTotal:' in line:
-                            memory_total_mb = int(line.split()[1]) / 1024
-                        elif 'MemAvailable:' in line:
-                            available_mb = int(line.split()[1]) / 1024
-                            memory_used_mb = memory_total_mb - available_mb
-                            memory_percent = (memory_used_mb / memory_total_mb) * 100
-                            break
-            except (FileNotFoundError, PermissionError, Exception):
-                # Not on Linux or can't read /proc/meminfo
-                pass
+            if self._has_meminfo:
+                try:
+                    fd = os.open('/proc/meminfo', os.O_RDONLY)
+                    try:
+                        meminfo = os.read(fd, 8192)
+                    finally:
+                        os.close(fd)
+                except OSError:
+                    meminfo = b''
+                
+                total_kb = _meminfo_kb(meminfo, b'MemTotal:')
+                available_kb = _meminfo_kb(meminfo, b'MemAvailable:')
+                if total_kb:
+                    memory_total_mb = total_kb / 1024
+                    if available_kb is not None:
+                        memory_used_mb = (total_kb - available_kb) / 1024
+                        memory_percent = (memory_used_mb / memory_total_mb) * 100
             
             # CPU percentage - simplified (just return 0 since we can't easily get it without psutil)
             cpu_percent = 0.0
@@ -136,65 +196,68 @@ class HealthMonitor:
     
     def record_api_request(self, success: bool, response_time: float):
         """Record API request metrics"""
-        self.api_metrics.total_requests += 1
-        
-        if success:
-            self.api_metrics.successful_requests += 1
-        else:
-            self.api_metrics.failed_requests += 1
-        
-        self.api_metrics.last_request_time = datetime.utcnow()
-        
-        # Update response time tracking
-        self.request_times.append(response_time)
-        if len(self.request_times) > 1000:  # Keep only last 1000 requests
-            self.request_times = self.request_times[-1000:]
-        
-        self.api_metrics.average_response_time = sum(self.request_times) / len(self.request_times)
-        self.api_metrics.error_rate = (self.api_metrics.failed_requests / self.api_metrics.total_requests) * 100
-        
-        # Calculate requests per minute (last 60 seconds)
-        one_minute_ago = datetime.utcnow() - timedelta(minutes=1)
-        recent_requests = len([t for t in self.request_times if t > one_minute_ago.timestamp()])
-        self.api_metrics.requests_per_minute = recent_requests
+        with self._api_lock:
+            self.api_metrics.total_requests += 1
+            
+            if success:
+                self.api_metrics.successful_requests += 1
+            else:
+                self.api_metrics.failed_requests += 1
+            
+            self.api_metrics.last_request_time = time.time_ns()
+            
+            # Update response time tracking
+            if len(self.request_times) == self.request_times.maxlen:
+                self._request_time_sum -= self.request_times[0]
+            self.request_times.append(response_time)
+            self._request_time_sum += response_time
+            
+            self.api_metrics.average_response_time = self._request_time_sum / len(self.request_times)
+            self.api_metrics.error_rate = (self.api_metrics.failed_requests / self.api_metrics.total_requests) * 100
+            
+            # Calculate requests per minute (last 60 seconds)
+            now = time.monotonic()
+            self._request_timestamps.append(now)
+            cutoff = now - 60.0
+            while self._request_timestamps[0] < cutoff:
+                self._request_timestamps.popleft()
+            self.api_metrics.requests_per_minute = len(self._request_timestamps)
+            self._api_dict = None
     
     def record_scrape_attempt(self, success: bool, duration: float, items_scraped: int = 0, items_saved: int = 0, source: str = ""):
         """Record scraping attempt metrics"""
-        self.scraping_metrics.total_scrapes += 1
-        
-        if success:
-            self.scraping_metrics.successful_scrapes += 1
-            self.scraping_metrics.total_items_scraped += items_scraped
-            self.scraping_metrics.total_items_saved += items_saved
-            self.scraping_metrics.sources_status[source] = "success"
-        else:
-            self.scraping_metrics.failed_scrapes += 1
-            self.scraping_metrics.sources_status[source] = "failed"
-        
-        self.scraping_metrics.last_scrape_time = datetime.utcnow()
-        
-        # Update duration tracking
-        self.scrape_durations.append(duration)
-        if len(self.scrape_durations) > 100:  # Keep only last 100 scrapes
-            self.scrape_durations = self.scrape_durations[-100:]
-        
-        self.scraping_metrics.average_scrape_duration = sum(self.scrape_durations) / len(self.scrape_durations)
+        with self._scrape_lock:
+            self.scraping_metrics.total_scrapes += 1
+            
+            if success:
+                self.scraping_metrics.successful_scrapes += 1
+                self.scraping_metrics.total_items_scraped += items_scraped
+                self.scraping_metrics.total_items_saved += items_saved
+                self.scraping_metrics.sources_status[source] = "success"
+            else:
+                self.scraping_metrics.failed_scrapes += 1
+                self.scraping_metrics.sources_status[source] = "failed"
+            
+            self.scraping_metrics.last_scrape_time = time.time_ns()
+            
+            # Update duration tracking
+            if len(self.scrape_durations) == self.scrape_durations.maxlen:
+                self._scrape_duration_sum -= self.scrape_durations[0]
+            self.scrape_durations.append(duration)
+            self._scrape_duration_sum += duration
+            
+            self.scraping_metrics.average_scrape_duration = self._scrape_duration_sum / len(self.scrape_durations)
+            self._scraping_dict = None
     
     def get_health_status(self) -> Dict[str, Any]:
         """Get overall health status"""
         system_metrics = self.get_system_metrics()
         
         # Determine health status
-        health_issues = []
-        
-        if system_metrics.cpu_percent > 80:
-            health_issues.append("High CPU usage")
-        
-        if system_metrics.memory_percent > 85:
-            health_issues.append("High memory usage")
-        
-        if system_metrics.disk_percent > 90:
-            health_issues.append("Low disk space")
+        health_issues = [
+            issue for field, limit, issue in _SYSTEM_THRESHOLDS
+            if getattr(system_metrics, field) > limit
+        ]
         
         if self.api_metrics.error_rate > 10:
             health_issues.append("High API error rate")
@@ -207,6 +270,17 @@ class HealthMonitor:
         else:
             status = "unhealthy"
         
+        with self._api_lock:
+            if self._api_dict is None:
+                self._api_dict = asdict(self.api_metrics)
+                self._api_dict["last_request_time"] = _ns_to_datetime(self.api_metrics.last_request_time)
+            api_dict = self._api_dict
+        with self._scrape_lock:
+            if self._scraping_dict is None:
+                self._scraping_dict = asdict(self.scraping_metrics)
+                self._scraping_dict["last_scrape_time"] = _ns_to_datetime(self.scraping_metrics.last_scrape_time)
+            scraping_dict = self._scraping_dict
+        
         return {
             "status": status,
             "timestamp": datetime.utcnow().isoformat(),
@@ -214,22 +288,31 @@ class HealthMonitor:
             "uptime_human": self._format_uptime(system_metrics.uptime_seconds),
             "issues": health_issues,
             "system": asdict(system_metrics),
-            "api": asdict(self.api_metrics),
-            "scraping": asdict(self.scraping_metrics)
+            "api": api_dict,
+            "scraping": scraping_dict
         }
     
     def _format_uptime(self, seconds: float) -> str:
         """Format uptime in human readable format"""
+        # The string only changes once a minute, so reuse the last one
+        total_minutes = int(seconds // 60)
+        cached_minutes, formatted = self._uptime_cache
+        if cached_minutes == total_minutes:
+            return formatted
+        
         days = int(seconds // 86400)
         hours = int((seconds % 86400) // 3600)
         minutes = int((seconds % 3600) // 60)
         
         if days > 0:
-            return f"{days}d {hours}h {minutes}m"
+            formatted = f"{days}d {hours}h {minutes}m"
         elif hours > 0:
-            return f"{hours}h {minutes}m"
+            formatted = f"{hours}h {minutes}m"
         else:
-            return f"{minutes}m"
+            formatted = f"{minutes}m"
+        
+        self._uptime_cache = (total_minutes, formatted)
+        return formatted
     
     def get_performance_summary(self) -> Dict[str, Any]:
         """Get performance summary for monitoring dashboards"""
@@ -255,6 +338,15 @@ class HealthMonitor:
                 "total_items_saved": self.scraping_metrics.total_items_saved
             }
         }
+    
+    def health_status_json(self) -> bytes:
+        """Get overall health status encoded as JSON"""
+        # orjson encodes the nested datetimes natively, so no default= hook
+        return orjson.dumps(self.get_health_status())
+    
+    def performance_summary_json(self) -> bytes:
+        """Get the performance summary encoded as JSON"""
+        return orjson.dumps(self.get_performance_summary())
 
 # Global health monitor instance
 health_monitor = HealthMonitor()
@@ -0,0 +1,86 @@
+"""
+Keyword matching for the scrapers' text classification helpers
+"""
+
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+import ahocorasick
+
+class KeywordMatcher:
+    """Aho-Corasick automaton that finds every labelled keyword in one pass
+
+    ``groups`` is an ordered sequence of ``(label, keywords)`` pairs. Keywords
+    match as plain substrings unless ``whole_words`` is set, in which case a
+    hit only counts when it is not flanked by letters or digits (so "us" does
+    not match inside "because"). Callers pass text in the same case as the
+    keywords (lowercase throughout the scrapers).
+    """
+
+    def __init__(self, groups: Iterable[Tuple[str, Iterable[str]]], whole_words: bool = False):
+        self.whole_words = whole_words
+        self._labels: List[str] = []
+        self._automaton = ahocorasick.Automaton()
+
+        for rank, (label, keywords) in enumerate(groups):
+            self._labels.append(label)
+            for keyword in keywords:
+                _, ranks = self._automaton.get(keyword, (0, ()))
+                self._automaton.add_word(keyword, (len(keyword), ranks + (rank,)))
+
+        self._automaton.make_automaton()
+
+    def _positioned_hits(self, text: str) -> Iterator[Tuple[int, Tuple[int, ...]]]:
+        for end, (length, keyword_ranks) in self._automaton.iter(text):
+            start = end - length + 1
+            if self.whole_words:
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if end + 1 < len(text) and text[end + 1].isalnum():
+                    continue
+            yield start, keyword_ranks
+
+    def _hits(self, text: str) -> Iterator[Tuple[int, ...]]:
+        for _, keyword_ranks in self._positioned_hits(text):
+            yield keyword_ranks
+
+    def _ranks(self, text: str) -> Set[int]:
+        ranks: Set[int] = set()
+        for keyword_ranks in self._hits(text):
+            ranks.update(keyword_ranks)
+        return ranks
+
+    def iter_labels(self, text: str) -> Iterator[str]:
+        """Lazily yield the label of each keyword hit, in text order"""
+        for keyword_ranks in self._hits(text):
+            for rank in keyword_ranks:
+                yield self._labels[rank]
+
+    def labels(self, text: str) -> Set[str]:
+        """Return the labels of every group with a keyword in text"""
+        return {self._labels[rank] for rank in self._ranks(text)}
+
+    def ordered_labels(self, text: str) -> List[str]:
+        """Return matching labels in the order their groups were declared"""
+        return [self._labels[rank] for rank in sorted(self._ranks(text))]
+
+    def first(self, text: str) -> Optional[str]:
+        """Return the earliest-declared label with a keyword in text"""
+        ranks = self._ranks(text)
+        return self._labels[min(ranks)] if ranks else None
+
+    def first_position(self, text: str) -> Optional[int]:
+        """Return the start index of the earliest-ending keyword hit in text"""
+        for start, _ in self._positioned_hits(text):
+            return start
+        return None
+
+    def matches(self, text: str) -> bool:
+        """Return True if any keyword occurs in text"""
+        for _ in self._hits(text):
+            return True
+        return False
+
+    @classmethod
+    def from_keywords(cls, keywords: Iterable[str], whole_words: bool = False) -> "KeywordMatcher":
+        """Build a matcher where each keyword is its own label"""
+        return cls(((keyword, (keyword,)) for keyword in keywords), whole_words=whole_words)
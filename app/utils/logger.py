@@ -2,10 +2,14 @@ from loguru import logger
 import sys
 import os
 
+from app.config import get_settings
+
+settings = get_settings()
+
 # Configure logger
 logger.remove()  # Remove default handler
 
-# Add console handler
+# Add console handler (loguru only colorizes when stdout is a TTY)
 logger.add(
     sys.stdout,
     format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
@@ -13,15 +17,21 @@ logger.add(
 )
 
 # Add file handler
-log_dir = "logs"
-os.makedirs(log_dir, exist_ok=True)
+log_dir = os.path.dirname(settings.log_file)
+if log_dir:
+    os.makedirs(log_dir, exist_ok=True)
 
+# Records are queued to a writer thread so request handlers never wait on disk;
+# DEBUG output is opt-in through LOG_LEVEL
 logger.add(
-    f"{log_dir}/defi_guard.log",
-    rotation="1 day",
-    retention="30 days",
-    level="DEBUG",
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+    settings.log_file,
+    rotation=settings.log_rotation,
+    retention=settings.log_retention,
+    level=settings.log_level.upper(),
+    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
+    enqueue=True,
+    backtrace=False,
+    diagnose=False
 )
 
 # Export the logger
@@ -0,0 +1,29 @@
+"""
+Request rate limiting for the scrapers
+"""
+
+import asyncio
+
+class RateLimiter:
+    """Spaces successive request starts at least ``interval`` seconds apart
+
+    Unlike sleeping before every request, concurrent callers only wait for
+    their own slot, so requests still overlap on the network while the
+    source sees no more than one new request per interval.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    async def wait(self):
+        """Block until the caller's request slot is due"""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
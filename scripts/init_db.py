@@ -23,9 +23,13 @@ async def initialize_database():
         logger.info("Database tables created successfully")
         
         # Check if we have any existing data
+        # (first row only; a COUNT(*) would scan the whole table)
         db = SessionLocal()
-        count = db.query(ThreatIntelDB).count()
-        logger.info(f"Current database contains {count} threat intelligence items")
+        has_data = db.query(ThreatIntelDB.id).first() is not None
+        if has_data:
+            logger.info("Database already contains threat intelligence items")
+        else:
+            logger.info("Database is empty")
         db.close()
         
         return True